@@ -7,9 +7,11 @@ const express = require('express');
 const cors = require('cors');
 const fs = require('fs');
 const path = require('path');
+const zlib = require('zlib');
 
 const app = express();
-const PORT = process.env.PORT || 3001;
+// Parsed once to a number so an unset or malformed PORT falls back to the default
+const PORT = Number.parseInt(process.env.PORT, 10) || 3001;
 
 // Data file path - persisted in a volume (mutable for tests)
 let DATA_DIR = process.env.DATA_DIR || './data';
@@ -20,6 +22,22 @@ const DEFAULT_GAME_ID = 'flappy';
 // Valid game IDs (can be extended as more games are added)
 const VALID_GAME_IDS = ['flappy'];
 
+// Entries returned by GET /api/leaderboard when no valid ?limit= is given
+const DEFAULT_LIMIT = 10;
+
+// Serialized GET responses, reused until the leaderboard changes (bounded so
+// arbitrary query strings can't grow it without limit)
+const MAX_CACHED_RESPONSES = 64;
+const responseCache = new Map();
+
+// Cached bodies at least this large are also kept gzip-compressed, so repeat
+// requests don't pay for compression again (Caddy passes encoded bodies through)
+const GZIP_MIN_BYTES = 1024;
+
+// Parsed leaderboards keyed by file path, revalidated with a stat() against the
+// file's mtime and size instead of re-reading and re-parsing it on every request
+const leaderboardCache = new Map();
+
 // Middleware
 app.use(cors());
 app.use(express.json());
@@ -46,9 +64,20 @@ function getLeaderboardFile(gameId) {
 function getLeaderboard(gameId = DEFAULT_GAME_ID) {
   const leaderboardFile = getLeaderboardFile(gameId);
   try {
-    if (fs.existsSync(leaderboardFile)) {
-      const data = fs.readFileSync(leaderboardFile, 'utf-8');
-      return JSON.parse(data);
+    const stat = fs.statSync(leaderboardFile, { throwIfNoEntry: false });
+    if (stat) {
+      const cached = leaderboardCache.get(leaderboardFile);
+      if (cached && cached.mtimeMs === stat.mtimeMs && cached.size === stat.size) {
+        return cached.data;
+      }
+      const data = JSON.parse(fs.readFileSync(leaderboardFile, 'utf-8'));
+      // Changed on disk since it was cached: serialized responses are stale too
+      leaderboardCache.set(leaderboardFile, { mtimeMs: stat.mtimeMs, size: stat.size, data });
+      responseCache.clear();
+      return data;
+    }
+    if (leaderboardCache.delete(leaderboardFile)) {
+      responseCache.clear();
     }
   } catch (error) {
     console.error(`Error reading leaderboard for ${gameId}:`, error);
@@ -86,35 +115,89 @@ function saveLeaderboard(data, gameId = DEFAULT_GAME_ID) {
   const leaderboardFile = getLeaderboardFile(gameId);
   try {
     fs.writeFileSync(leaderboardFile, JSON.stringify(data, null, 2));
+    const stat = fs.statSync(leaderboardFile);
+    leaderboardCache.set(leaderboardFile, { mtimeMs: stat.mtimeMs, size: stat.size, data });
   } catch (error) {
+    // The caller may have mutated data before the write failed; reload from disk next time
+    leaderboardCache.delete(leaderboardFile);
     console.error(`Error saving leaderboard for ${gameId}:`, error);
     throw error;
+  } finally {
+    // Any write may change what the read endpoints return
+    responseCache.clear();
   }
 }
 
+/**
+ * Parse the ?limit= query value: a positive integer, otherwise DEFAULT_LIMIT
+ */
+function parseLimit(value) {
+  const limit = Number.parseInt(value, 10);
+  return limit > 0 ? limit : DEFAULT_LIMIT;
+}
+
+/**
+ * Highest-scoring `k` entries in descending score order (ties keep file order,
+ * like a stable sort). Small k is selected in one pass instead of sorting everything.
+ */
+function topEntries(entries, k) {
+  if (k > 32) {
+    return [...entries].sort((a, b) => b.score - a.score).slice(0, k);
+  }
+  const top = [];
+  for (const entry of entries) {
+    if (top.length === k && entry.score <= top[k - 1].score) continue;
+    let i = top.length;
+    while (i > 0 && top[i - 1].score < entry.score) i--;
+    top.splice(i, 0, entry);
+    if (top.length > k) top.pop();
+  }
+  return top;
+}
+
+/**
+ * Send a JSON body, serializing (and compressing) it only once per cache key until the next write
+ */
+function sendCachedJSON(req, res, key, build) {
+  let cached = responseCache.get(key);
+  if (cached === undefined) {
+    const body = JSON.stringify(build());
+    const gzipped = Buffer.byteLength(body) >= GZIP_MIN_BYTES ? zlib.gzipSync(body) : null;
+    cached = { body, gzipped };
+    if (responseCache.size >= MAX_CACHED_RESPONSES) {
+      responseCache.clear();
+    }
+    responseCache.set(key, cached);
+  }
+  res.type('json');
+  res.vary('Accept-Encoding');
+  if (cached.gzipped && req.acceptsEncodings('gzip')) {
+    res.set('Content-Encoding', 'gzip').send(cached.gzipped);
+    return;
+  }
+  res.send(cached.body);
+}
+
 // GET /api/leaderboard - Get leaderboard entries for a specific game
 app.get('/api/leaderboard', (req, res) => {
   const gameId = req.query.gameId || DEFAULT_GAME_ID;
-  const limit = parseInt(req.query.limit) || 10;
+  const limit = parseLimit(req.query.limit);
   const data = getLeaderboard(gameId);
-  
-  // Sort by score descending
-  const sortedEntries = [...data.entries].sort((a, b) => b.score - a.score);
-  
-  // Limit entries
-  const limitedEntries = sortedEntries.slice(0, limit);
-  
-  // Mark champion
-  limitedEntries.forEach((entry, index) => {
-    entry.isChampion = index === 0;
-  });
-  
-  const champion = limitedEntries.length > 0 ? limitedEntries[0] : null;
-  
-  res.json({
-    entries: limitedEntries,
-    champion,
-    gameId,
+
+  sendCachedJSON(req, res, `board|${gameId}|${limit}`, () => {
+    // Top entries by score descending, champion marked on copies (data is the cached leaderboard)
+    const limitedEntries = topEntries(data.entries, limit).map((entry, index) => ({
+      ...entry,
+      isChampion: index === 0,
+    }));
+
+    const champion = limitedEntries.length > 0 ? limitedEntries[0] : null;
+
+    return {
+      entries: limitedEntries,
+      champion,
+      gameId,
+    };
   });
 });
 
@@ -148,8 +231,7 @@ app.post('/api/leaderboard', (req, res) => {
   };
   
   // Check if this is a new champion
-  const sortedEntries = [...data.entries].sort((a, b) => b.score - a.score);
-  const currentChampion = sortedEntries[0];
+  const [currentChampion] = topEntries(data.entries, 1);
   const isNewChampion = !currentChampion || parsedScore > currentChampion.score;
   
   // Add new entry
@@ -171,15 +253,16 @@ app.post('/api/leaderboard', (req, res) => {
 app.get('/api/leaderboard/lowest', (req, res) => {
   const gameId = req.query.gameId || DEFAULT_GAME_ID;
   const data = getLeaderboard(gameId);
-  const sortedEntries = [...data.entries].sort((a, b) => b.score - a.score);
-  
-  // If less than 10 entries, threshold is 0 (anyone can join)
-  if (sortedEntries.length < 10) {
-    return res.json({ lowestScore: 0, gameId });
-  }
-  
-  // Otherwise return the 10th entry's score
-  res.json({ lowestScore: sortedEntries[9]?.score || 0, gameId });
+
+  sendCachedJSON(req, res, `lowest|${gameId}`, () => {
+    // If less than 10 entries, threshold is 0 (anyone can join)
+    if (data.entries.length < 10) {
+      return { lowestScore: 0, gameId };
+    }
+
+    // Otherwise return the 10th entry's score
+    return { lowestScore: topEntries(data.entries, 10)[9]?.score || 0, gameId };
+  });
 });
 
 // GET /api/games - Get list of available games (for future use)
@@ -203,6 +286,8 @@ app.get('/api/health', (req, res) => {
  */
 function startServer(port = PORT, dataDir = DATA_DIR) {
   DATA_DIR = dataDir;
+  responseCache.clear();
+  leaderboardCache.clear();
   ensureDataDir();
   const server = app.listen(port, () => {
     console.log(`🏆 Leaderboard API running on port ${server.address().port}`);
@@ -142,4 +142,36 @@ describe('Leaderboard API', () => {
     expect(res.status).toBe(200)
     expect(res.data.lowestScore).toBe(0)
   })
+
+  it('serves fresh, gzip-encoded boards after each write', async () => {
+    const submit = (i) =>
+      request('POST', '/leaderboard', {
+        name: `Gzip${i}`,
+        pipes: i,
+        params: 8706,
+        architecture: '6→64→64→2',
+        score: i,
+        gameId: 'flappy-gzip',
+      })
+
+    for (let i = 0; i < 20; i++) await submit(i)
+    const first = await request('GET', '/leaderboard?gameId=flappy-gzip&limit=20')
+    expect(first.data.entries).toHaveLength(20)
+
+    // The cached response must be dropped on the next submit
+    await submit(100)
+    const response = await fetch(`${baseUrl}/leaderboard?gameId=flappy-gzip&limit=20`)
+    expect(response.headers.get('content-encoding')).toBe('gzip')
+    const data = await response.json()
+    expect(data.entries[0].name).toBe('Gzip100')
+    expect(data.entries[0].isChampion).toBe(true)
+  })
+
+  it('falls back to the default limit for invalid values', async () => {
+    for (const limit of ['-5', '0', 'abc']) {
+      const res = await request('GET', `/leaderboard?gameId=flappy-gzip&limit=${limit}`)
+      expect(res.status).toBe(200)
+      expect(res.data.entries).toHaveLength(10)
+    }
+  })
 })
\ No newline at end of file
@@ -0,0 +1,32 @@
+import { describe, expect, it } from 'vitest'
+import { GameEngine } from './GameEngine'
+import { VectorizedEnv } from './VectorizedEnv'
+
+function pipeGaps(engine: GameEngine, steps: number): number[] {
+  engine.reset()
+  for (let i = 0; i < steps && !engine.getState().done; i++) engine.step(i % 6 === 0 ? 1 : 0)
+  return engine.getState().pipes.map(pipe => pipe.gapCenterY)
+}
+
+describe('GameEngine', () => {
+  it('replays the same pipe sequence for the same seed', () => {
+    const a = pipeGaps(new GameEngine(undefined, undefined, 42), 60)
+    const b = pipeGaps(new GameEngine(undefined, undefined, 42), 60)
+    const c = pipeGaps(new GameEngine(undefined, undefined, 43), 60)
+
+    expect(a.length).toBeGreaterThan(0)
+    expect(b).toEqual(a)
+    expect(c).not.toEqual(a)
+  })
+
+  it('gives each seeded vectorized env its own stream', () => {
+    const env = new VectorizedEnv(2, undefined, undefined, 7)
+    env.resetAll()
+    const [first, second] = env.getStates()
+    expect(first.pipes[0].gapCenterY).not.toBe(second.pipes[0].gapCenterY)
+
+    const again = new VectorizedEnv(2, undefined, undefined, 7)
+    again.resetAll()
+    expect(again.getStates()[1].pipes[0].gapCenterY).toBe(second.pipes[0].gapCenterY)
+  })
+})
@@ -16,9 +16,52 @@ import {
   type PipeState,
   createInitialState,
   stateToObservation,
+  getObservationDim,
   clamp,
 } from './GameState'
 
+// Lowest the bird can sink before it is clamped (fixed by the physics constants)
+const BIRD_MAX_Y = GameConfig.VIEWPORT_HEIGHT - GameConfig.BIRD.HEIGHT * 0.75
+
+// Vertical band (20%-80% of the viewport) that every gap must fit inside
+const GAP_BAND_TOP = GameConfig.VIEWPORT_HEIGHT * 0.2
+const GAP_BAND_BOTTOM = GameConfig.VIEWPORT_HEIGHT * 0.8
+
+// Gap size per pipe number, fixed by the (immutable) config so it is built once.
+// Gap linearly decreases from INITIAL_GAP (pipe 0) to MIN_GAP (pipe MAX_PIPES - 1)
+const GAP_SCHEDULE = (() => {
+  const { INITIAL_GAP, MIN_GAP, MAX_PIPES } = GameConfig.PIPE
+  const schedule = new Float64Array(MAX_PIPES)
+  for (let i = 0; i < MAX_PIPES; i++) {
+    const progress = i / (MAX_PIPES - 1)
+    schedule[i] = INITIAL_GAP - (INITIAL_GAP - MIN_GAP) * progress
+  }
+  return schedule
+})()
+
+// A new pipe spawns once the last one's x drops below this
+// (WIDTH - (x + PIPE.WIDTH) > PIPE.WIDTH * 2.5, solved for x)
+const SPAWN_X_THRESHOLD = GameConfig.WIDTH - GameConfig.PIPE.WIDTH * 3.5
+
+// Pipe x positions: newly spawned pipes enter just past the right edge, and
+// each episode starts with two pipes SPAWN_DISTANCE apart
+const SPAWN_X = GameConfig.WIDTH + 10
+const INITIAL_PIPE_1_X = GameConfig.PIPE.INITIAL_X_OFFSET
+const INITIAL_PIPE_2_X = INITIAL_PIPE_1_X + GameConfig.PIPE.SPAWN_DISTANCE
+
+/**
+ * Small seeded PRNG (mulberry32) returning floats in [0, 1)
+ */
+function createSeededRandom(seed: number): () => number {
+  let t = seed >>> 0
+  return () => {
+    t = (t + 0x6d2b79f5) >>> 0
+    let r = Math.imul(t ^ (t >>> 15), t | 1)
+    r ^= r + Math.imul(r ^ (r >>> 7), r | 61)
+    return ((r ^ (r >>> 14)) >>> 0) / 4294967296
+  }
+}
+
 export interface StepResult {
   observation: number[]
   reward: number
@@ -33,18 +76,29 @@ export interface StepResult {
 export class GameEngine {
   private state: RawGameState
   private rewardConfig: RewardConfig
-  private observationConfig: ObservationConfig
+  private observationConfig: Readonly<ObservationConfig>
+  private observationDim: number
   private prevScore: number = 0
   private episode: number = 0
   private totalSteps: number = 0
   private pipeCount: number = 0 // Tracks total pipes spawned for progressive difficulty
+  private pipePool: PipeState[] = [] // Expired pipe objects, reused by createRandomPipe
+  private random: () => number // Per-engine RNG for pipe placement
 
+  /**
+   * @param seed - Optional seed for a reproducible pipe sequence (defaults to Math.random)
+   */
   constructor(
     rewardConfig: RewardConfig = DefaultRewardConfig,
-    observationConfig: ObservationConfig = DefaultObservationConfig
+    observationConfig: ObservationConfig = DefaultObservationConfig,
+    seed?: number
   ) {
     this.rewardConfig = rewardConfig
-    this.observationConfig = observationConfig
+    // Feature flags are fixed for the engine's lifetime: snapshot them and
+    // count the observation length once instead of on every step
+    this.observationConfig = { ...observationConfig }
+    this.observationDim = getObservationDim(this.observationConfig)
+    this.random = seed === undefined ? Math.random : createSeededRandom(seed)
     this.state = createInitialState()
   }
 
@@ -52,6 +106,8 @@ export class GameEngine {
    * Reset the game and return initial observation
    */
   reset(): number[] {
+    // Recycle the finished episode's pipes before dropping its state
+    for (const pipe of this.state.pipes) this.pipePool.push(pipe)
     this.state = createInitialState()
     this.prevScore = 0
     this.episode++
@@ -114,7 +170,7 @@ export class GameEngine {
    * Get the current observation vector
    */
   getObservation(): number[] {
-    return stateToObservation(this.state, this.observationConfig)
+    return stateToObservation(this.state, this.observationConfig, this.observationDim)
   }
 
   /**
@@ -145,14 +201,10 @@ export class GameEngine {
   // ===== Private methods =====
 
   /**
-   * Calculate gap size for a given pipe number (progressive difficulty)
-   * Gap linearly decreases from INITIAL_GAP (pipe 0) to MIN_GAP (pipe 999)
+   * Gap size for a given pipe number (progressive difficulty), read from GAP_SCHEDULE
    */
   private calculateGapForPipe(pipeNumber: number): number {
-    const { INITIAL_GAP, MIN_GAP, MAX_PIPES } = GameConfig.PIPE
-    // Clamp pipe number to valid range and calculate progress (0 to 1)
-    const progress = Math.min(pipeNumber, MAX_PIPES - 1) / (MAX_PIPES - 1)
-    return INITIAL_GAP - (INITIAL_GAP - MIN_GAP) * progress
+    return GAP_SCHEDULE[Math.min(pipeNumber, GAP_SCHEDULE.length - 1)]
   }
 
   private flap(): void {
@@ -163,21 +215,20 @@ export class GameEngine {
   }
 
   private updateBird(): void {
-    // Apply gravity
-    if (this.state.birdVelY < GameConfig.BIRD.MAX_VELOCITY_DOWN) {
-      this.state.birdVelY += GameConfig.BIRD.GRAVITY
-    }
+    // Integrate on locals and write the state back once
+    const state = this.state
+
+    // Apply gravity up to terminal velocity, branch-free. Velocities only change
+    // by whole GRAVITY steps from the cap, so capping never cuts a step short
+    const velY = Math.min(state.birdVelY + GameConfig.BIRD.GRAVITY, GameConfig.BIRD.MAX_VELOCITY_DOWN)
 
     // Update position
-    this.state.birdY = clamp(
-      this.state.birdY + this.state.birdVelY,
-      GameConfig.BIRD.MIN_Y,
-      GameConfig.VIEWPORT_HEIGHT - GameConfig.BIRD.HEIGHT * 0.75
-    )
+    state.birdVelY = velY
+    state.birdY = clamp(state.birdY + velY, GameConfig.BIRD.MIN_Y, BIRD_MAX_Y)
 
     // Update rotation
-    this.state.birdRotation = clamp(
-      this.state.birdRotation + GameConfig.BIRD.ROTATION_SPEED,
+    state.birdRotation = clamp(
+      state.birdRotation + GameConfig.BIRD.ROTATION_SPEED,
       GameConfig.BIRD.ROTATION_MIN,
       GameConfig.BIRD.ROTATION_MAX
     )
@@ -185,9 +236,20 @@ export class GameEngine {
 
   private updatePipes(): void {
     // Move all pipes
-    for (const pipe of this.state.pipes) {
-      pipe.x += GameConfig.PIPE.VELOCITY
+    const pipes = this.state.pipes
+    const velocity = GameConfig.PIPE.VELOCITY
+    for (let i = 0; i < pipes.length; i++) {
+      pipes[i].x += velocity
+    }
+
+    // Remove off-screen pipes. They are x-ordered and move together, so the
+    // expired ones are always a prefix and go in one splice (usually none)
+    const minX = -GameConfig.PIPE.WIDTH
+    let expired = 0
+    while (expired < pipes.length && pipes[expired].x <= minX) {
+      this.pipePool.push(pipes[expired++])
     }
+    if (expired > 0) pipes.splice(0, expired)
 
     // Update floor scroll position (synced with pipe movement)
     // Floor sprite width is typically 336px, but we use 336 as a safe default
@@ -195,11 +257,6 @@ export class GameEngine {
     this.state.floorX = (this.state.floorX + GameConfig.FLOOR.VELOCITY) % floorWidth
     if (this.state.floorX > 0) this.state.floorX -= floorWidth // Keep it negative or zero
 
-    // Remove off-screen pipes
-    this.state.pipes = this.state.pipes.filter(
-      (pipe) => pipe.x > -GameConfig.PIPE.WIDTH
-    )
-
     // Spawn new pipes if needed
     this.maybeSpawnPipe()
   }
@@ -210,62 +267,52 @@ export class GameEngine {
       return
     }
 
+    // Spawn once the last pipe leaves more than 2.5 pipe widths clear before the right edge
     const lastPipe = this.state.pipes[this.state.pipes.length - 1]
-    const distanceFromLast = GameConfig.WIDTH - (lastPipe.x + GameConfig.PIPE.WIDTH)
-
-    if (distanceFromLast > GameConfig.PIPE.WIDTH * 2.5) {
+    if (lastPipe.x < SPAWN_X_THRESHOLD) {
       this.spawnPipe()
     }
   }
 
   private spawnPipe(): void {
-    // Calculate gap size based on current pipe count (progressive difficulty)
-    const gapSize = this.calculateGapForPipe(this.pipeCount)
-    
-    // Random gap position (matching Python logic)
-    const baseY = GameConfig.VIEWPORT_HEIGHT
-    const minGapY = baseY * 0.2 + gapSize / 2
-    const maxGapY = baseY * 0.8 - gapSize / 2
-    const gapCenterY = minGapY + Math.random() * (maxGapY - minGapY)
-
-    this.state.pipes.push({
-      x: GameConfig.WIDTH + 10,
-      gapCenterY,
-      gapSize,
-      gapVelY: 0,
-      passed: false,
-    })
-    
-    this.pipeCount++ // Increment for next pipe's progressive difficulty
+    // Same factory as the initial pipes, so every pipe object has one shape
+    this.state.pipes.push(this.createRandomPipe())
   }
 
   private spawnInitialPipes(): void {
-    // Spawn first pipe
-    const pipe1 = this.createRandomPipe()
-    pipe1.x = GameConfig.PIPE.INITIAL_X_OFFSET
-
-    // Spawn second pipe
-    const pipe2 = this.createRandomPipe()
-    pipe2.x = pipe1.x + GameConfig.PIPE.SPAWN_DISTANCE
-
-    this.state.pipes = [pipe1, pipe2]
+    // Built at their final x positions, into the fresh state's (empty) pipe array
+    this.state.pipes.push(
+      this.createRandomPipe(INITIAL_PIPE_1_X),
+      this.createRandomPipe(INITIAL_PIPE_2_X)
+    )
   }
 
-  private createRandomPipe(): PipeState {
+  private createRandomPipe(x: number = SPAWN_X): PipeState {
     // Calculate gap size based on current pipe count (progressive difficulty)
     const gapSize = this.calculateGapForPipe(this.pipeCount)
     
-    const baseY = GameConfig.VIEWPORT_HEIGHT
-    const minGapY = baseY * 0.2 + gapSize / 2
-    const maxGapY = baseY * 0.8 - gapSize / 2
-    const gapCenterY = minGapY + Math.random() * (maxGapY - minGapY)
-
-    const pipe: PipeState = {
-      x: GameConfig.WIDTH + 10,
-      gapCenterY,
-      gapSize,
-      gapVelY: 0,
-      passed: false,
+    // Random gap position (matching Python logic)
+    const halfGap = gapSize / 2
+    const minGapY = GAP_BAND_TOP + halfGap
+    const maxGapY = GAP_BAND_BOTTOM - halfGap
+    const gapCenterY = minGapY + this.random() * (maxGapY - minGapY)
+
+    // Reuse an expired pipe when one is available; all pipes share one shape
+    let pipe = this.pipePool.pop()
+    if (pipe) {
+      pipe.x = x
+      pipe.gapCenterY = gapCenterY
+      pipe.gapSize = gapSize
+      pipe.gapVelY = 0
+      pipe.passed = false
+    } else {
+      pipe = {
+        x,
+        gapCenterY,
+        gapSize,
+        gapVelY: 0,
+        passed: false,
+      }
     }
     
     this.pipeCount++ // Increment for next pipe's progressive difficulty
@@ -278,6 +325,9 @@ export class GameEngine {
     const birdY = this.state.birdY
     const birdW = GameConfig.BIRD.WIDTH
     const birdH = GameConfig.BIRD.HEIGHT
+    const birdRight = birdX + birdW
+    const birdBottom = birdY + birdH
+    const pipeW = GameConfig.PIPE.WIDTH
 
     // Win condition: passed all 1000 pipes
     if (this.state.score >= GameConfig.PIPE.MAX_PIPES) {
@@ -286,7 +336,7 @@ export class GameEngine {
     }
 
     // Floor collision
-    if (birdY + birdH >= GameConfig.VIEWPORT_HEIGHT) {
+    if (birdBottom >= GameConfig.VIEWPORT_HEIGHT) {
       this.state.done = true
       return
     }
@@ -296,18 +346,19 @@ export class GameEngine {
       // Not a death, just clamped
     }
 
-    // Pipe collisions
+    // Pipe collisions (pipes are kept in ascending x order, so stop at the
+    // first one that starts past the bird's right edge)
     for (const pipe of this.state.pipes) {
+      if (pipe.x >= birdRight) break
+
       // Check if bird overlaps with pipe horizontally
-      if (
-        birdX + birdW > pipe.x &&
-        birdX < pipe.x + GameConfig.PIPE.WIDTH
-      ) {
+      if (birdX < pipe.x + pipeW) {
         // Check vertical overlap with upper or lower pipe (using per-pipe gap size)
-        const gapTop = pipe.gapCenterY - pipe.gapSize / 2
-        const gapBottom = pipe.gapCenterY + pipe.gapSize / 2
+        const halfGap = pipe.gapSize * 0.5
+        const gapTop = pipe.gapCenterY - halfGap
+        const gapBottom = pipe.gapCenterY + halfGap
 
-        if (birdY < gapTop || birdY + birdH > gapBottom) {
+        if (birdY < gapTop || birdBottom > gapBottom) {
           this.state.done = true
           return
         }
@@ -317,13 +368,18 @@ export class GameEngine {
 
   private updateScore(): void {
     const birdCenterX = GameConfig.BIRD.X + GameConfig.BIRD.WIDTH / 2
+    const halfPipeW = GameConfig.PIPE.WIDTH / 2
+    const velocity = GameConfig.PIPE.VELOCITY
 
     for (const pipe of this.state.pipes) {
       if (!pipe.passed) {
-        const pipeCenterX = pipe.x + GameConfig.PIPE.WIDTH / 2
+        const pipeCenterX = pipe.x + halfPipeW
+
+        // Pipes are x-ordered: once one is still ahead of the bird, so are the rest
+        if (pipeCenterX > birdCenterX) break
 
         // Check if bird just crossed pipe center
-        if (birdCenterX >= pipeCenterX && birdCenterX < pipeCenterX - GameConfig.PIPE.VELOCITY) {
+        if (birdCenterX >= pipeCenterX && birdCenterX < pipeCenterX - velocity) {
           pipe.passed = true
           this.state.score++
         }
@@ -29,7 +29,7 @@ export interface PipeState {
   x: number
   gapCenterY: number
   gapSize: number // Per-pipe gap size for progressive difficulty
-  gapVelY?: number // For moving gaps
+  gapVelY: number // For moving gaps (always set, so every pipe has the same shape)
   passed: boolean
 }
 
@@ -49,57 +49,68 @@ export function createInitialState(): RawGameState {
   }
 }
 
+// Velocity normalization cap, fixed by the physics constants
+const VELY_CAP = Math.max(
+  Math.abs(GameConfig.BIRD.MAX_VELOCITY_DOWN),
+  Math.abs(GameConfig.BIRD.MAX_VELOCITY_UP)
+)
+
+// Reciprocals of the normalization constants, so observations multiply instead of divide
+const INV_VELY_CAP = 1 / VELY_CAP
+const INV_WIDTH = 1 / GameConfig.WIDTH
+const INV_VIEWPORT_HEIGHT = 1 / GameConfig.VIEWPORT_HEIGHT
+
 /**
  * Convert raw state to normalized observation vector for RL
  * Matches Python implementation exactly for consistency
+ * @param dim - getObservationDim(config), for callers that precompute it once per config
  */
 export function stateToObservation(
   state: RawGameState,
-  config: ObservationConfig
+  config: ObservationConfig,
+  dim: number = getObservationDim(config)
 ): number[] {
-  const obs: number[] = []
+  // Pre-sized and filled by index; each observation is a fresh array because
+  // callers keep the previous one as the replay buffer's state alongside the next
+  const obs: number[] = new Array(dim)
+  let k = 0
 
   // Bird Y position normalized by viewport height
   if (config.birdY) {
-    obs.push(state.birdY / GameConfig.VIEWPORT_HEIGHT)
+    obs[k++] = state.birdY * INV_VIEWPORT_HEIGHT
   }
 
   // Bird velocity normalized by max velocity
   if (config.birdVel) {
-    const velyCap = Math.max(
-      Math.abs(GameConfig.BIRD.MAX_VELOCITY_DOWN),
-      Math.abs(GameConfig.BIRD.MAX_VELOCITY_UP)
-    )
-    const clampedVel = clamp(state.birdVelY, -velyCap, velyCap)
-    obs.push(clampedVel / velyCap)
+    obs[k++] = clamp(state.birdVelY, -VELY_CAP, VELY_CAP) * INV_VELY_CAP
   }
 
   // Get next two pipes (or default if not enough pipes)
-  const pipe1 = state.pipes[0] || createDefaultPipe(1)
-  const pipe2 = state.pipes[1] || createDefaultPipe(2)
+  const pipe1 = state.pipes[0] || DEFAULT_PIPE_1
+  const pipe2 = state.pipes[1] || DEFAULT_PIPE_2
 
   // Pipe 1 features
   if (config.dx1) {
-    obs.push((pipe1.x - GameConfig.BIRD.X) / GameConfig.WIDTH)
+    obs[k++] = (pipe1.x - GameConfig.BIRD.X) * INV_WIDTH
   }
   if (config.dy1) {
-    obs.push((pipe1.gapCenterY - state.birdY) / GameConfig.VIEWPORT_HEIGHT)
+    obs[k++] = (pipe1.gapCenterY - state.birdY) * INV_VIEWPORT_HEIGHT
   }
 
   // Pipe 2 features
   if (config.dx2) {
-    obs.push((pipe2.x - GameConfig.BIRD.X) / GameConfig.WIDTH)
+    obs[k++] = (pipe2.x - GameConfig.BIRD.X) * INV_WIDTH
   }
   if (config.dy2) {
-    obs.push((pipe2.gapCenterY - state.birdY) / GameConfig.VIEWPORT_HEIGHT)
+    obs[k++] = (pipe2.gapCenterY - state.birdY) * INV_VIEWPORT_HEIGHT
   }
 
   // Gap velocities (for moving gaps mode)
   if (config.gapVel1) {
-    obs.push((pipe1.gapVelY || 0) / GameConfig.VIEWPORT_HEIGHT)
+    obs[k++] = pipe1.gapVelY * INV_VIEWPORT_HEIGHT
   }
   if (config.gapVel2) {
-    obs.push((pipe2.gapVelY || 0) / GameConfig.VIEWPORT_HEIGHT)
+    obs[k++] = pipe2.gapVelY * INV_VIEWPORT_HEIGHT
   }
 
   return obs
@@ -134,6 +145,10 @@ function createDefaultPipe(index: number): PipeState {
   }
 }
 
+// Read-only placeholders for missing pipes, shared instead of built per observation
+const DEFAULT_PIPE_1: Readonly<PipeState> = createDefaultPipe(1)
+const DEFAULT_PIPE_2: Readonly<PipeState> = createDefaultPipe(2)
+
 /**
  * Utility: clamp value between min and max
  */
@@ -67,6 +67,11 @@ export class TiledRenderer {
   private numInstances: number = 1
   private layout: TileLayout
 
+  // Per-frame draw parameters derived from the layout, recomputed only when it changes
+  private scoreScale: number = 1
+  private labelFont: string = ''
+  private emptyTileFont: string = ''
+
   // Animation state per tile
   private birdFrames: number[] = []
   private frameCount: number = 0
@@ -97,6 +102,7 @@ export class TiledRenderer {
 
     // Initial layout
     this.layout = calculateLayout(1, canvasWidth, canvasHeight)
+    this.updateLayoutDerived()
   }
 
   /**
@@ -113,6 +119,7 @@ export class TiledRenderer {
   setInstanceCount(count: number): void {
     this.numInstances = count
     this.layout = calculateLayout(count, this.canvasWidth, this.canvasHeight)
+    this.updateLayoutDerived()
 
     // Reset bird frames array
     this.birdFrames = new Array(count).fill(0)
@@ -196,7 +203,7 @@ export class TiledRenderer {
     )
 
     // Draw score (slightly larger when more tiles to keep readability)
-    this.drawScore(state.score, this.getScoreScale())
+    this.drawScore(state.score, this.scoreScale)
 
     // Draw game over overlay if done
     if (state.done) {
@@ -211,7 +218,7 @@ export class TiledRenderer {
     }
 
     // Draw tile index label
-    this.drawTileLabel(index, scale)
+    this.drawTileLabel(index)
 
     // Draw 1px black border around tile (only when multiple instances)
     if (this.numInstances > 1) {
@@ -232,7 +239,7 @@ export class TiledRenderer {
    * Render an empty placeholder tile
    */
   private renderEmptyTile(index: number): void {
-    const { cols, tileWidth, tileHeight, scale } = this.layout
+    const { cols, tileWidth, tileHeight } = this.layout
     const col = index % cols
     const row = Math.floor(index / cols)
     const offsetX = col * tileWidth
@@ -247,7 +254,7 @@ export class TiledRenderer {
 
     // Label
     this.ctx.fillStyle = '#4a4a6a'
-    this.ctx.font = `${Math.floor(16 * scale)}px Arial`
+    this.ctx.font = this.emptyTileFont
     this.ctx.textAlign = 'center'
     this.ctx.fillText(`#${index + 1}`, tileWidth / 2, tileHeight / 2)
 
@@ -270,6 +277,16 @@ export class TiledRenderer {
     drawSharedScore(this.ctx, this.sprites, score, GameConfig.WIDTH, 20, sizeScale)
   }
 
+  /**
+   * Recompute the score scale and font strings that depend only on the layout
+   */
+  private updateLayoutDerived(): void {
+    const scale = this.layout.scale
+    this.scoreScale = this.getScoreScale()
+    this.labelFont = `bold ${Math.max(10, Math.floor(14 / scale))}px Arial`
+    this.emptyTileFont = `${Math.floor(16 * scale)}px Arial`
+  }
+
   /**
    * Scale score digits based on number of tiles:
    * linearly grows from 1.0 (1 tile) to 2.0 (16+ tiles)
@@ -287,16 +304,15 @@ export class TiledRenderer {
   /**
    * Draw tile index label
    */
-  private drawTileLabel(index: number, scale: number): void {
+  private drawTileLabel(index: number): void {
     // Only show labels when there are multiple tiles
     if (this.numInstances <= 1) return
 
-    const fontSize = Math.max(10, Math.floor(14 / scale))
     this.ctx.fillStyle = 'rgba(0, 0, 0, 0.5)'
     this.ctx.fillRect(2, 2, 24, 16)
     
     this.ctx.fillStyle = '#ffffff'
-    this.ctx.font = `bold ${fontSize}px Arial`
+    this.ctx.font = this.labelFont
     this.ctx.textAlign = 'left'
     this.ctx.textBaseline = 'top'
     this.ctx.fillText(`#${index + 1}`, 5, 4)
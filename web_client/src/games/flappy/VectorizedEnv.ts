@@ -36,39 +36,41 @@ export class VectorizedEnv {
   private numEnvs: number
   private rewardConfig: RewardConfig
   private observationConfig: ObservationConfig
+  private seed?: number
 
-  // Per-environment episode tracking
-  private episodeRewards: number[]
-  private episodeLengths: number[]
-  private episodeCounts: number[]
+  // Per-environment episode tracking (one typed array per field, indexed by env)
+  private episodeRewards: Float64Array
+  private episodeLengths: Int32Array
+  private episodeCounts: Int32Array
   
   // Per-environment last step reward (for visualization)
-  private lastStepRewards: number[]
+  private lastStepRewards: Float64Array
 
   // Callbacks for episode completion
   private onEpisodeComplete?: (stats: EpisodeStats) => void
 
+  /**
+   * @param seed - Optional base seed; env i gets its own reproducible stream (seed + i)
+   */
   constructor(
     numEnvs: number,
     rewardConfig: RewardConfig = DefaultRewardConfig,
-    observationConfig: ObservationConfig = DefaultObservationConfig
+    observationConfig: ObservationConfig = DefaultObservationConfig,
+    seed?: number
   ) {
     this.numEnvs = numEnvs
     this.rewardConfig = rewardConfig
     this.observationConfig = observationConfig
+    this.seed = seed
     this.engines = []
-    this.episodeRewards = []
-    this.episodeLengths = []
-    this.episodeCounts = []
-    this.lastStepRewards = []
+    this.episodeRewards = new Float64Array(numEnvs)
+    this.episodeLengths = new Int32Array(numEnvs)
+    this.episodeCounts = new Int32Array(numEnvs)
+    this.lastStepRewards = new Float64Array(numEnvs)
 
     // Create all game engines
     for (let i = 0; i < numEnvs; i++) {
-      this.engines.push(new GameEngine(rewardConfig, observationConfig))
-      this.episodeRewards.push(0)
-      this.episodeLengths.push(0)
-      this.episodeCounts.push(0)
-      this.lastStepRewards.push(0)
+      this.engines.push(this.createEngine(i))
     }
 
     console.log(`[VectorizedEnv] Created ${numEnvs} parallel environments`)
@@ -119,14 +121,24 @@ export class VectorizedEnv {
     const dones: boolean[] = []
     const scores: number[] = []
     const infos: { score: number; episode: number; steps: number }[] = []
-    const completedEpisodes: EpisodeStats[] = []
+    // Only buffered when someone is listening and an episode actually ends
+    const onEpisodeComplete = this.onEpisodeComplete
+    let completedEpisodes: EpisodeStats[] | null = null
+
+    // Bind per-env storage once instead of re-reading it through `this` per env
+    const engines = this.engines
+    const episodeRewards = this.episodeRewards
+    const episodeLengths = this.episodeLengths
+    const lastStepRewards = this.lastStepRewards
 
     for (let i = 0; i < this.numEnvs; i++) {
+      const engine = engines[i]
+
       // In manual eval (autoReset === false), skip stepping envs that already finished.
       // Otherwise they would emit duplicate episode completions every loop.
-      if (!autoReset && this.engines[i].getState().done) {
-        const observation = this.engines[i].getObservation()
-        const info = this.engines[i].getInfo()
+      if (!autoReset && engine.getState().done) {
+        const observation = engine.getObservation()
+        const info = engine.getInfo()
         observations.push(observation)
         rewards.push(0)
         dones.push(true)
@@ -135,33 +147,36 @@ export class VectorizedEnv {
         continue
       }
 
-      const result = this.engines[i].step(actions[i] as 0 | 1)
+      const result = engine.step(actions[i] as 0 | 1)
 
       // Track last step reward for visualization
-      this.lastStepRewards[i] = result.reward
+      lastStepRewards[i] = result.reward
 
       // Track episode stats
-      this.episodeRewards[i] += result.reward
-      this.episodeLengths[i]++
+      episodeRewards[i] += result.reward
+      episodeLengths[i]++
 
       if (result.done) {
         // Episode completed - record stats
-        completedEpisodes.push({
-          envIndex: i,
-          score: result.info.score,
-          reward: this.episodeRewards[i],
-          length: this.episodeLengths[i],
-        })
+        if (onEpisodeComplete) {
+          if (!completedEpisodes) completedEpisodes = []
+          completedEpisodes.push({
+            envIndex: i,
+            score: result.info.score,
+            reward: episodeRewards[i],
+            length: episodeLengths[i],
+          })
+        }
 
         this.episodeCounts[i]++
 
         if (autoReset) {
           // Auto-reset for training mode
-          const newObs = this.engines[i].reset()
+          const newObs = engine.reset()
           observations.push(newObs)
-          this.episodeRewards[i] = 0
-          this.episodeLengths[i] = 0
-          this.lastStepRewards[i] = 0
+          episodeRewards[i] = 0
+          episodeLengths[i] = 0
+          lastStepRewards[i] = 0
         } else {
           // Keep terminal observation for eval mode
           observations.push(result.observation)
@@ -177,9 +192,9 @@ export class VectorizedEnv {
     }
 
     // Notify about completed episodes
-    if (this.onEpisodeComplete) {
+    if (onEpisodeComplete && completedEpisodes) {
       for (const stats of completedEpisodes) {
-        this.onEpisodeComplete(stats)
+        onEpisodeComplete(stats)
       }
     }
 
@@ -203,12 +218,12 @@ export class VectorizedEnv {
   /**
    * Get states with reward information for visualization
    */
-  getStatesWithRewards(): Array<{ state: RawGameState; reward: number; cumulativeReward: number }> {
-    return this.engines.map((engine, i) => ({
-      state: engine.getState() as RawGameState,
-      reward: this.lastStepRewards[i],
-      cumulativeReward: this.episodeRewards[i],
-    }))
+  getStatesWithRewards(): { states: RawGameState[]; rewards: number[]; cumulativeRewards: number[] } {
+    return {
+      states: this.getStates(),
+      rewards: Array.from(this.lastStepRewards),
+      cumulativeRewards: Array.from(this.episodeRewards),
+    }
   }
 
   /**
@@ -276,9 +291,9 @@ export class VectorizedEnv {
     counts: number[]
   } {
     return {
-      rewards: [...this.episodeRewards],
-      lengths: [...this.episodeLengths],
-      counts: [...this.episodeCounts],
+      rewards: Array.from(this.episodeRewards),
+      lengths: Array.from(this.episodeLengths),
+      counts: Array.from(this.episodeCounts),
     }
   }
 
@@ -290,9 +305,16 @@ export class VectorizedEnv {
     avgReward: number
     avgLength: number
   } {
-    const totalEpisodes = this.episodeCounts.reduce((a, b) => a + b, 0)
-    const avgReward = this.episodeRewards.reduce((a, b) => a + b, 0) / this.numEnvs
-    const avgLength = this.episodeLengths.reduce((a, b) => a + b, 0) / this.numEnvs
+    let totalEpisodes = 0
+    let rewardSum = 0
+    let lengthSum = 0
+    for (let i = 0; i < this.numEnvs; i++) {
+      totalEpisodes += this.episodeCounts[i]
+      rewardSum += this.episodeRewards[i]
+      lengthSum += this.episodeLengths[i]
+    }
+    const avgReward = rewardSum / this.numEnvs
+    const avgLength = lengthSum / this.numEnvs
 
     return { totalEpisodes, avgReward, avgLength }
   }
@@ -306,26 +328,32 @@ export class VectorizedEnv {
     if (newNumEnvs > this.numEnvs) {
       // Add more environments
       for (let i = this.numEnvs; i < newNumEnvs; i++) {
-        this.engines.push(new GameEngine(this.rewardConfig, this.observationConfig))
+        this.engines.push(this.createEngine(i))
         this.engines[i].reset()
-        this.episodeRewards.push(0)
-        this.episodeLengths.push(0)
-        this.episodeCounts.push(0)
-        this.lastStepRewards.push(0)
       }
     } else {
       // Remove environments
       this.engines = this.engines.slice(0, newNumEnvs)
-      this.episodeRewards = this.episodeRewards.slice(0, newNumEnvs)
-      this.episodeLengths = this.episodeLengths.slice(0, newNumEnvs)
-      this.episodeCounts = this.episodeCounts.slice(0, newNumEnvs)
-      this.lastStepRewards = this.lastStepRewards.slice(0, newNumEnvs)
     }
 
+    // Surviving envs keep their stats; new ones start at zero
+    this.episodeRewards = resizeTypedArray(this.episodeRewards, newNumEnvs)
+    this.episodeLengths = resizeTypedArray(this.episodeLengths, newNumEnvs)
+    this.episodeCounts = resizeTypedArray(this.episodeCounts, newNumEnvs)
+    this.lastStepRewards = resizeTypedArray(this.lastStepRewards, newNumEnvs)
+
     this.numEnvs = newNumEnvs
     console.log(`[VectorizedEnv] Resized to ${newNumEnvs} environments`)
   }
 
+  /**
+   * Create the engine for env `index`, seeded from the base seed when one was given
+   */
+  private createEngine(index: number): GameEngine {
+    const seed = this.seed === undefined ? undefined : this.seed + index
+    return new GameEngine(this.rewardConfig, this.observationConfig, seed)
+  }
+
   /**
    * Get number of environments
    */
@@ -341,6 +369,15 @@ export class VectorizedEnv {
   }
 }
 
+/**
+ * Copy a per-env typed array into a new one of the given length (zero-filled when growing)
+ */
+function resizeTypedArray<T extends Float64Array | Int32Array>(array: T, length: number): T {
+  const resized = new (array.constructor as new (length: number) => T)(length)
+  resized.set(array.subarray(0, Math.min(array.length, length)))
+  return resized
+}
+
 /**
  * Valid instance counts (4x growth): 1, 4, 16, 64, 256, 1024
  */
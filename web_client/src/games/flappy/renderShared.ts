@@ -43,8 +43,10 @@ export function loadImage(path: string): Promise<HTMLImageElement> {
 
 /**
  * Flip an image vertically (for upper pipe)
+ * Encodes off the main thread via toBlob and resolves only once the flipped
+ * image is decoded, so it is ready to draw on the first frame
  */
-export function flipImageVertically(img: HTMLImageElement): HTMLImageElement {
+export async function flipImageVertically(img: HTMLImageElement): Promise<HTMLImageElement> {
   const canvas = document.createElement('canvas')
   canvas.width = img.width
   canvas.height = img.height
@@ -53,17 +55,27 @@ export function flipImageVertically(img: HTMLImageElement): HTMLImageElement {
   ctx.scale(1, -1)
   ctx.drawImage(img, 0, 0)
 
+  const blob = await new Promise<Blob | null>((resolve) => canvas.toBlob(resolve))
+  if (!blob) throw new Error('Failed to encode flipped image')
+
+  const url = URL.createObjectURL(blob)
   const flipped = new Image()
-  flipped.src = canvas.toDataURL()
+  flipped.src = url
+  try {
+    await flipped.decode()
+  } finally {
+    URL.revokeObjectURL(url)
+  }
   return flipped
 }
 
-/**
- * Load all game sprites (common set)
- * @param includeMessage - Whether to load the welcome message sprite
- */
-export async function loadAllSprites(includeMessage: boolean = false): Promise<SpriteSet> {
-  const imagePromises = [
+// Sprites are identical for every renderer, so they are loaded (and the pipe
+// flipped) once per page and shared; a failed load is forgotten so it can be retried
+let commonSpritesPromise: Promise<SpriteSet> | null = null
+let messagePromise: Promise<HTMLImageElement> | null = null
+
+async function loadCommonSprites(): Promise<SpriteSet> {
+  const images = await Promise.all([
     loadImage('background-day.png'),
     loadImage('base.png'),
     loadImage('yellowbird-upflap.png'),
@@ -81,13 +93,7 @@ export async function loadAllSprites(includeMessage: boolean = false): Promise<S
     loadImage('7.png'),
     loadImage('8.png'),
     loadImage('9.png'),
-  ]
-
-  if (includeMessage) {
-    imagePromises.push(loadImage('message.png'))
-  }
-
-  const images = await Promise.all(imagePromises)
+  ])
 
   const [
     background,
@@ -96,25 +102,54 @@ export async function loadAllSprites(includeMessage: boolean = false): Promise<S
     pipeGreen,
     gameOver,
     d0, d1, d2, d3, d4, d5, d6, d7, d8, d9,
-    ...rest
   ] = images
 
-  const message = includeMessage ? rest[0] : undefined
-
   return {
     background,
     floor,
     bird: [bird0, bird1, bird2, bird1], // Animation cycle: up, mid, down, mid
-    pipeUp: flipImageVertically(pipeGreen),
+    pipeUp: await flipImageVertically(pipeGreen),
     pipeDown: pipeGreen,
     digits: [d0, d1, d2, d3, d4, d5, d6, d7, d8, d9],
     gameOver,
-    message,
   }
 }
 
+/**
+ * Load all game sprites (common set)
+ * @param includeMessage - Whether to load the welcome message sprite
+ */
+export async function loadAllSprites(includeMessage: boolean = false): Promise<SpriteSet> {
+  // Start both loads before awaiting so the message downloads alongside the rest
+  let common = commonSpritesPromise
+  if (!common) {
+    common = commonSpritesPromise = loadCommonSprites()
+    common.catch(() => { commonSpritesPromise = null })
+  }
+  let message = includeMessage ? messagePromise : null
+  if (includeMessage && !message) {
+    message = messagePromise = loadImage('message.png')
+    message.catch(() => { messagePromise = null })
+  }
+
+  const sprites = await common
+  return message ? { ...sprites, message: await message } : sprites
+}
+
 // ============ Text Drawing ============
 
+// CSS font strings by size, built once instead of per drawn label
+const outlinedFonts = new Map<number, string>()
+
+function outlinedFont(fontSize: number): string {
+  let font = outlinedFonts.get(fontSize)
+  if (!font) {
+    font = `bold ${fontSize}px Arial, sans-serif`
+    outlinedFonts.set(fontSize, font)
+  }
+  return font
+}
+
 /**
  * Draw text with black outline and drop shadow
  */
@@ -129,7 +164,7 @@ export function drawOutlinedText(
   baseline: CanvasTextBaseline = 'bottom'
 ): void {
   ctx.save()
-  ctx.font = `bold ${fontSize}px Arial, sans-serif`
+  ctx.font = outlinedFont(fontSize)
   ctx.textAlign = align
   ctx.textBaseline = baseline
 
@@ -245,13 +280,16 @@ export function drawPipes(
   sprites: SpriteSet,
   pipes: { x: number; gapCenterY: number; gapSize: number }[]
 ): void {
-  for (const pipe of pipes) {
+  // Sprites are the same for every pipe; bind them once per call
+  const { pipeUp, pipeDown } = sprites
+  const pipeUpHeight = pipeUp.height
+
+  for (let i = 0; i < pipes.length; i++) {
+    const pipe = pipes[i]
     // Use per-pipe gapSize for progressive difficulty
-    const gapTop = pipe.gapCenterY - pipe.gapSize / 2
-    const gapBottom = pipe.gapCenterY + pipe.gapSize / 2
-    const upperY = gapTop - sprites.pipeUp.height
-    ctx.drawImage(sprites.pipeUp, pipe.x, upperY)
-    ctx.drawImage(sprites.pipeDown, pipe.x, gapBottom)
+    const halfGap = pipe.gapSize / 2
+    ctx.drawImage(pipeUp, pipe.x, pipe.gapCenterY - halfGap - pipeUpHeight)
+    ctx.drawImage(pipeDown, pipe.x, pipe.gapCenterY + halfGap)
   }
 }
 
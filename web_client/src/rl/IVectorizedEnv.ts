@@ -110,9 +110,10 @@ export interface IVectorizedEnv<
   getScores(): number[]
 
   /**
-   * Get states with reward information for visualization
+   * Get states with reward information for visualization.
+   * Columnar (one array per field, indexed by env) so it can be posted as-is.
    */
-  getStatesWithRewards(): Array<{ state: TGameState; reward: number; cumulativeReward: number }>
+  getStatesWithRewards(): { states: TGameState[]; rewards: number[]; cumulativeRewards: number[] }
 
   /**
    * Get aggregate statistics across all environments
@@ -0,0 +1,89 @@
+import { describe, expect, it } from 'vitest'
+import { ReplayBuffer } from './ReplayBuffer'
+
+// Multiples of 1/64 are stored exactly by the buffer's 16-bit fixed-point encoding
+const v = (x: number) => [x / 64, x / 128]
+
+function transition(id: number, done: boolean = false) {
+  return {
+    state: v(id),
+    action: id % 2,
+    reward: id,
+    nextState: v(id + 1),
+    done,
+  }
+}
+
+describe('ReplayBuffer', () => {
+  it('overwrites the oldest transitions once full', () => {
+    const buffer = new ReplayBuffer(4)
+    for (let i = 0; i < 6; i++) buffer.add(transition(i))
+
+    expect(buffer.size()).toBe(4)
+    const rewards = buffer.sample(4).map(t => t.reward).sort((a, b) => a - b)
+    expect(rewards).toEqual([2, 3, 4, 5])
+  })
+
+  it('samples flat batches that keep each transition aligned', () => {
+    const buffer = new ReplayBuffer(100)
+    for (let i = 0; i < 50; i++) buffer.add(transition(i, i % 7 === 0))
+
+    const batch = buffer.sampleBatch(32)
+    expect(batch.size).toBe(32)
+    expect(batch.states.length).toBe(64)
+    for (let i = 0; i < batch.size; i++) {
+      const id = batch.rewards[i]
+      expect(batch.states[i * 2]).toBe(id / 64)
+      expect(batch.states[i * 2 + 1]).toBe(id / 128)
+      expect(batch.nextStates[i * 2]).toBe((id + 1) / 64)
+      expect(batch.actions[i]).toBe(id % 2)
+      expect(batch.notDones[i]).toBe(id % 7 === 0 ? 0 : 1)
+    }
+  })
+
+  it('keeps the most recent transitions when resized', () => {
+    const buffer = new ReplayBuffer(8)
+    for (let i = 0; i < 11; i++) buffer.add(transition(i))
+
+    buffer.resize(3)
+    expect(buffer.size()).toBe(3)
+    expect(buffer.sample(3).map(t => t.reward).sort((a, b) => a - b)).toEqual([8, 9, 10])
+
+    buffer.resize(6)
+    for (let i = 11; i < 14; i++) buffer.add(transition(i))
+    expect(buffer.size()).toBe(6)
+    expect(buffer.sample(6).map(t => t.reward).sort((a, b) => a - b)).toEqual([8, 9, 10, 11, 12, 13])
+
+    buffer.add(transition(14))
+    expect(buffer.sample(6).map(t => t.reward).sort((a, b) => a - b)).toEqual([9, 10, 11, 12, 13, 14])
+  })
+
+  it('recovers next states from linked slots across steps, episode ends and env changes', () => {
+    const buffer = new ReplayBuffer(64)
+    // Two envs; env 1 ends its episode at step 1 and resets to v(100)
+    buffer.addStep([v(0), v(10)], [0, 1], [0, 10], [v(1), v(11)], [false, false])
+    buffer.addStep([v(1), v(11)], [1, 0], [1, 11], [v(2), v(12)], [false, true])
+    buffer.addStep([v(2), v(100)], [0, 0], [2, 100], [v(3), v(101)], [false, false])
+    // Env count changes: pending next states must survive
+    buffer.addStep([v(50)], [1], [50], [v(51)], [false])
+
+    const byReward = new Map(buffer.sample(buffer.size()).map(t => [t.reward, t.nextState]))
+    expect(byReward.get(0)).toEqual(v(1))
+    expect(byReward.get(10)).toEqual(v(11))
+    expect(byReward.get(11)).toEqual(v(12))
+    expect(byReward.get(2)).toEqual(v(3))
+    expect(byReward.get(100)).toEqual(v(101))
+    expect(byReward.get(50)).toEqual(v(51))
+  })
+
+  it('stores states in fixed point, clamping values outside [-4, 4)', () => {
+    const buffer = new ReplayBuffer(4)
+    buffer.add({ state: [0.123456, -9], action: 0, reward: 0, nextState: [1.5, 9], done: true })
+
+    const [t] = buffer.sample(1)
+    expect(t.state[0]).toBeCloseTo(0.123456, 4)
+    expect(t.state[1]).toBe(-4)
+    expect(t.nextState[0]).toBe(1.5)
+    expect(t.nextState[1]).toBeCloseTo(4, 3)
+  })
+})
@@ -1,6 +1,14 @@
 /**
  * Experience Replay Buffer for DQN
- * Stores transitions and provides random batch sampling
+ * Stores transitions in pre-allocated typed arrays and provides random batch sampling
+ *
+ * Observations are stored once: a transition's next state is normally the state
+ * of the same env's following transition, so each slot keeps a link to that slot
+ * instead of a second copy. Next states that don't continue into a stored
+ * transition (episode ends, env resets, env count changes) are kept separately.
+ *
+ * States are stored as 16-bit fixed point. Observations are normalized to roughly
+ * [-1, 2], so a 1/8192 step over [-4, 4) keeps ~1e-4 precision at half the bytes.
  */
 
 export interface Transition {
@@ -11,10 +19,71 @@ export interface Transition {
   done: boolean
 }
 
+/**
+ * A sampled batch laid out as flat typed arrays (row-major states).
+ * states, nextStates, rewards and notDones are consecutive views into `packed`, so the
+ * float part of a batch can be uploaded as a single buffer.
+ * The arrays are owned by the buffer and reused by the next sampleBatch() call.
+ */
+export interface ReplayBatch {
+  size: number
+  stateDim: number
+  packed: Float32Array      // [states | nextStates | rewards | notDones]
+  states: Float32Array      // [size * stateDim]
+  actions: Int32Array       // [size]
+  rewards: Float32Array     // [size]
+  nextStates: Float32Array  // [size * stateDim]
+  notDones: Float32Array    // [size], 1 - done: 0 if the episode ended, 1 otherwise
+}
+
+// Storage grows in steps up to maxSize so small runs don't pay for a 1M-slot buffer
+const INITIAL_STORAGE = 1024
+
+// Per-transition row layout: [action, reward, done] as float32, then the state as
+// int16, padded so every row starts 4-byte aligned for the float32 view
+const ROW_SCALARS = 3
+
+// Fixed-point state encoding
+const STATE_SCALE = 8192
+const STATE_INV_SCALE = 1 / STATE_SCALE
+const STATE_Q_MIN = -32768
+const STATE_Q_MAX = 32767
+
+function quantize(value: number): number {
+  const q = Math.round(value * STATE_SCALE)
+  return q < STATE_Q_MIN ? STATE_Q_MIN : (q > STATE_Q_MAX ? STATE_Q_MAX : q)
+}
+
+// nextRef encoding: >= 0 successor slot, SPILLED = stored in spilledNext,
+// <= PENDING_BASE = waiting on env (PENDING_BASE - ref) to take its next step
+const SPILLED = -1
+const PENDING_BASE = -2
+
 export class ReplayBuffer {
-  private buffer: Transition[] = []
   private maxSize: number
   private position: number = 0
+  private count: number = 0
+
+  // Interleaved row storage (one contiguous row per transition), allocated on
+  // first add() once the state size is known. `scalars` and `qStates` view the
+  // same bytes; strides are in elements of each view.
+  private stateDim: number = 0
+  private scalarStride: number = 0
+  private qStride: number = 0
+  private storageSize: number = 0
+  private scalars: Float32Array = new Float32Array(0)
+  private qStates: Int16Array = new Int16Array(0)
+  private nextRef: Int32Array = new Int32Array(0)
+
+  // Quantized next states that could not be linked to a successor slot
+  private spilledNext: Map<number, Int16Array> = new Map()
+
+  // Newest transition per env, whose next state is only known by value until that env's next step
+  private pendingSlots: Int32Array = new Int32Array(0)
+  private pendingNext: Int16Array = new Int16Array(0)
+
+  // Reused sample output
+  private batch: ReplayBatch | null = null
 
   constructor(maxSize: number = 100000) {
     this.maxSize = maxSize
@@ -24,12 +93,160 @@ export class ReplayBuffer {
    * Add a transition to the buffer
    */
   add(transition: Transition): void {
-    if (this.buffer.length < this.maxSize) {
-      this.buffer.push(transition)
-    } else {
-      this.buffer[this.position] = transition
+    this.addStep(
+      [transition.state],
+      [transition.action],
+      [transition.reward],
+      [transition.nextState],
+      [transition.done]
+    )
+  }
+
+  /**
+   * Add one transition per env from a vectorized step.
+   * Each env's previous transition is linked to the slot written here when its
+   * next state matches the new state, so the observation is stored only once.
+   */
+  addStep(
+    states: number[][],
+    actions: number[],
+    rewards: number[],
+    nextStates: number[][],
+    dones: boolean[]
+  ): void {
+    const numEnvs = states.length
+    if (numEnvs === 0) return
+    if (this.stateDim === 0) {
+      this.stateDim = states[0].length
+      const rowBytes = Math.ceil((ROW_SCALARS * 4 + this.stateDim * 2) / 4) * 4
+      this.scalarStride = rowBytes / 4
+      this.qStride = rowBytes / 2
+    }
+    const dim = this.stateDim
+
+    // Env count changed: previous next states can't be matched by env anymore
+    if (this.pendingSlots.length !== numEnvs) {
+      this.spillPending()
+      this.pendingSlots = new Int32Array(numEnvs).fill(-1)
+      this.pendingNext = new Int16Array(numEnvs * dim)
+    }
+
+    for (let j = 0; j < numEnvs; j++) {
+      const state = states[j]
+      const idx = this.writeSlot(state, actions[j], rewards[j], dones[j])
+      const pendingOffset = j * dim
+
+      // Link the env's previous transition to this slot if it continues from it
+      const prev = this.pendingSlots[j]
+      if (prev >= 0) {
+        // Compared after quantization: that is the precision that gets stored anyway
+        let continues = true
+        for (let k = 0; k < dim; k++) {
+          if (this.pendingNext[pendingOffset + k] !== quantize(state[k])) {
+            continues = false
+            break
+          }
+        }
+        if (continues) {
+          this.nextRef[prev] = idx
+        } else {
+          this.spill(prev, j)
+        }
+      }
+
+      // This transition's next state stays pending until the env steps again
+      const nextState = nextStates[j]
+      for (let k = 0; k < dim; k++) {
+        this.pendingNext[pendingOffset + k] = quantize(nextState[k])
+      }
+      this.pendingSlots[j] = idx
+      this.nextRef[idx] = PENDING_BASE - j
+    }
+  }
+
+  /**
+   * Write a transition's state and scalars into the next ring slot
+   */
+  private writeSlot(state: number[], action: number, reward: number, done: boolean): number {
+    if (this.position >= this.storageSize) {
+      this.allocate(Math.min(this.maxSize, Math.max(INITIAL_STORAGE, this.storageSize * 2)), this.count)
+    }
+
+    const idx = this.position
+    if (idx < this.count) {
+      this.evict(idx)
+    }
+
+    const dim = this.stateDim
+    const scalars = this.scalars
+    const offset = idx * this.scalarStride
+    scalars[offset] = action
+    scalars[offset + 1] = reward
+    scalars[offset + 2] = done ? 1 : 0
+    const qStates = this.qStates
+    const qOffset = idx * this.qStride + ROW_SCALARS * 2
+    for (let k = 0; k < dim; k++) {
+      qStates[qOffset + k] = quantize(state[k])
+    }
+
+    // Compare-and-reset wrap instead of a modulo on every env step
+    if (this.count < this.maxSize) this.count++
+    this.position++
+    if (this.position === this.maxSize) this.position = 0
+    return idx
+  }
+
+  /**
+   * Drop the next-state bookkeeping of a slot that is about to be overwritten.
+   * Its predecessor was written earlier and has already been overwritten itself.
+   */
+  private evict(idx: number): void {
+    const ref = this.nextRef[idx]
+    if (ref === SPILLED) {
+      this.spilledNext.delete(idx)
+    } else if (ref <= PENDING_BASE) {
+      this.pendingSlots[PENDING_BASE - ref] = -1
     }
-    this.position = (this.position + 1) % this.maxSize
+  }
+
+  /**
+   * Move a pending next state into the spill storage
+   */
+  private spill(idx: number, env: number): void {
+    const dim = this.stateDim
+    this.spilledNext.set(idx, this.pendingNext.slice(env * dim, (env + 1) * dim))
+    this.nextRef[idx] = SPILLED
+  }
+
+  private spillPending(): void {
+    for (let j = 0; j < this.pendingSlots.length; j++) {
+      const idx = this.pendingSlots[j]
+      if (idx >= 0) this.spill(idx, j)
+    }
+  }
+
+  /**
+   * Quantized state view of a slot
+   */
+  private stateView(idx: number): Int16Array {
+    const offset = idx * this.qStride + ROW_SCALARS * 2
+    return this.qStates.subarray(offset, offset + this.stateDim)
+  }
+
+  /**
+   * Quantized view of the next state for a stored transition
+   */
+  private nextStateView(idx: number): Int16Array {
+    const dim = this.stateDim
+    const ref = this.nextRef[idx]
+    if (ref >= 0) {
+      return this.stateView(ref)
+    }
+    if (ref === SPILLED) {
+      return this.spilledNext.get(idx) as Int16Array
+    }
+    const env = PENDING_BASE - ref
+    return this.pendingNext.subarray(env * dim, (env + 1) * dim)
   }
 
   /**
@@ -39,85 +256,177 @@ export class ReplayBuffer {
     const batch: Transition[] = []
     const indices = new Set<number>()
 
-    while (indices.size < Math.min(batchSize, this.buffer.length)) {
-      indices.add(Math.floor(Math.random() * this.buffer.length))
+    while (indices.size < Math.min(batchSize, this.count)) {
+      indices.add(Math.floor(Math.random() * this.count))
     }
 
+    const dequantize = (q: number) => q * STATE_INV_SCALE
     for (const idx of indices) {
-      batch.push(this.buffer[idx])
+      const offset = idx * this.scalarStride
+      batch.push({
+        state: Array.from(this.stateView(idx), dequantize),
+        action: this.scalars[offset],
+        reward: this.scalars[offset + 1],
+        nextState: Array.from(this.nextStateView(idx), dequantize),
+        done: this.scalars[offset + 2] === 1,
+      })
     }
 
     return batch
   }
 
+  /**
+   * Sample a random batch (with replacement) into reused flat typed arrays.
+   * Avoids building per-transition objects and nested arrays on the training hot path.
+   */
+  sampleBatch(batchSize: number): ReplayBatch {
+    const dim = this.stateDim
+    if (!this.batch || this.batch.size !== batchSize || this.batch.stateDim !== dim) {
+      const stateSize = batchSize * dim
+      const packed = new Float32Array(2 * stateSize + 2 * batchSize)
+      this.batch = {
+        size: batchSize,
+        stateDim: dim,
+        packed,
+        states: packed.subarray(0, stateSize),
+        actions: new Int32Array(batchSize),
+        rewards: packed.subarray(2 * stateSize, 2 * stateSize + batchSize),
+        nextStates: packed.subarray(stateSize, 2 * stateSize),
+        notDones: packed.subarray(2 * stateSize + batchSize),
+      }
+    }
+
+    // One contiguous row read per sample, dequantized into the float batch
+    const out = this.batch
+    const scalars = this.scalars
+    const qStates = this.qStates
+    for (let i = 0; i < batchSize; i++) {
+      const idx = (Math.random() * this.count) | 0
+      const src = idx * this.scalarStride
+      out.actions[i] = scalars[src]
+      out.rewards[i] = scalars[src + 1]
+      out.notDones[i] = 1 - scalars[src + 2]  // Bootstrap mask precomputed on the host
+
+      const qSrc = idx * this.qStride + ROW_SCALARS * 2
+      const next = this.nextStateView(idx)
+      const dst = i * dim
+      for (let k = 0; k < dim; k++) {
+        out.states[dst + k] = qStates[qSrc + k] * STATE_INV_SCALE
+        out.nextStates[dst + k] = next[k] * STATE_INV_SCALE
+      }
+    }
+
+    return out
+  }
+
   /**
    * Get current buffer size
    */
   size(): number {
-    return this.buffer.length
+    return this.count
   }
 
   /**
    * Check if buffer has enough samples for training
    */
   canSample(batchSize: number): boolean {
-    return this.buffer.length >= batchSize
+    return this.count >= batchSize
   }
 
   /**
    * Clear the buffer
    */
   clear(): void {
-    this.buffer = []
     this.position = 0
+    this.count = 0
+    this.storageSize = 0
+    this.scalars = new Float32Array(0)
+    this.qStates = new Int16Array(0)
+    this.nextRef = new Int32Array(0)
+    this.spilledNext = new Map()
+    this.pendingSlots = new Int32Array(0)
+    this.pendingNext = new Int16Array(0)
   }
 
   /**
    * Resize the buffer capacity, preserving the most recent transitions
-   * - Growing: just increases maxSize, existing data stays
+   * - Growing: existing data stays; a wrapped ring is re-laid out oldest first
    * - Shrinking: keeps the most recent min(newCapacity, currentSize) transitions
    */
   resize(newCapacity: number): void {
     if (newCapacity === this.maxSize) return
 
-    if (newCapacity > this.maxSize) {
-      // Growing: just update maxSize, data and position remain valid
+    const wrapped = this.count === this.maxSize && this.position !== 0
+    if (newCapacity > this.maxSize && !wrapped) {
+      // Growing: data stays in place, new writes append after the existing items
       this.maxSize = newCapacity
+      this.position = this.count
       return
     }
 
-    // Shrinking: keep the most recent min(newCapacity, currentSize) transitions
-    const keepCount = Math.min(newCapacity, this.buffer.length)
+    // Keep the most recent min(newCapacity, currentSize) transitions
+    const keepCount = Math.min(newCapacity, this.count)
+    this.maxSize = newCapacity
     if (keepCount === 0) {
-      this.buffer = []
-      this.position = 0
-      this.maxSize = newCapacity
+      this.clear()
       return
     }
 
-    // Extract most recent items in order (oldest first for new circular buffer)
-    // position points to where next write will go, so newest is at (position - 1)
-    const newBuffer: Transition[] = []
-    const startIdx = (this.position - keepCount + this.buffer.length) % this.buffer.length
-    for (let i = 0; i < keepCount; i++) {
-      newBuffer.push(this.buffer[(startIdx + i) % this.buffer.length])
-    }
-
-    this.buffer = newBuffer
-    this.maxSize = newCapacity
+    this.allocate(Math.min(newCapacity, Math.max(INITIAL_STORAGE, keepCount)), keepCount)
+    this.count = keepCount
     // If we kept exactly newCapacity items, buffer is full, position wraps to 0
     // Otherwise position is at the end of the kept items
     this.position = keepCount % newCapacity
   }
-}
-
-
-
-
-
 
+  /**
+   * Reallocate storage with room for `size` transitions, copying the most recent
+   * `keepCount` transitions oldest first into slots [0, keepCount) and remapping
+   * next-state links to the new slots
+   */
+  private allocate(size: number, keepCount: number): void {
+    const stride = this.scalarStride
+    const scalars = new Float32Array(size * stride)
+    const nextRef = new Int32Array(size)
+    const spilledNext: Map<number, Int16Array> = new Map()
 
+    // position points to where next write will go, so newest is at (position - 1)
+    const ringSize = Math.max(1, this.count)
+    const startIdx = (this.position - keepCount + ringSize) % ringSize
+    const remap = (oldIdx: number): number => {
+      const rel = (oldIdx - startIdx + ringSize) % ringSize
+      return rel < keepCount ? rel : -1
+    }
 
+    for (let i = 0; i < keepCount; i++) {
+      const src = (startIdx + i) % ringSize
+      // Same-type set() copies the raw row bytes, int16 state included
+      scalars.set(this.scalars.subarray(src * stride, (src + 1) * stride), i * stride)
 
+      const ref = this.nextRef[src]
+      if (ref >= 0 && remap(ref) >= 0) {
+        nextRef[i] = remap(ref)
+      } else if (ref <= PENDING_BASE) {
+        nextRef[i] = ref
+      } else {
+        // Spilled, or linked to a slot that is being dropped (can't happen for ring order)
+        nextRef[i] = SPILLED
+        spilledNext.set(i, ref === SPILLED
+          ? this.spilledNext.get(src) as Int16Array
+          : this.stateView(ref).slice())
+      }
+    }
 
+    for (let j = 0; j < this.pendingSlots.length; j++) {
+      if (this.pendingSlots[j] >= 0) {
+        this.pendingSlots[j] = remap(this.pendingSlots[j])
+      }
+    }
 
+    this.scalars = scalars
+    this.qStates = new Int16Array(scalars.buffer)
+    this.nextRef = nextRef
+    this.spilledNext = spilledNext
+    this.storageSize = size
+  }
+}
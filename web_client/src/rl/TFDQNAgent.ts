@@ -4,6 +4,7 @@
  */
 
 import * as tf from '@tensorflow/tfjs'
+import type { ReplayBatch } from './ReplayBuffer'
 
 export interface TFDQNConfig {
   inputDim: number
@@ -33,14 +34,15 @@ export const DefaultTFDQNConfig: TFDQNConfig = {
   targetUpdateFreq: 500,
 }
 
+type ModelWeight = tf.LayersModel['weights'][number]
+
 /**
  * Create a DQN model using TensorFlow.js
  */
 function createDQNModel(
   inputDim: number,
   hiddenLayers: number[],
-  actionDim: number,
-  learningRate: number
+  actionDim: number
 ): tf.LayersModel {
   const model = tf.sequential()
 
@@ -68,15 +70,22 @@ function createDQNModel(
     kernelInitializer: 'glorotUniform',
   }))
 
-  // Compile with Adam optimizer and Huber loss (smooth L1)
-  model.compile({
-    optimizer: tf.train.adam(learningRate),
-    loss: tf.losses.huberLoss,
-  })
+  // Not compiled: training goes through the agent's own optimizer.minimize(), so a
+  // compile-time Adam per network would only be allocated and never stepped
 
   return model
 }
 
+/**
+ * Run a full-batch forward pass.
+ * model.predict() validates inputs and splits every call into 32-row chunks that are
+ * re-concatenated afterwards; apply() runs the whole batch through the graph at once,
+ * which matters for 1024-env action selection and for the 64-sample training batch.
+ */
+function forward(model: tf.LayersModel, input: tf.Tensor): tf.Tensor {
+  return model.apply(input, { training: false }) as tf.Tensor
+}
+
 /**
  * TensorFlow.js DQN Agent
  * Supports batched inference for parallel environments
@@ -86,6 +95,12 @@ export class TFDQNAgent {
   private policyNetwork: tf.LayersModel
   private targetNetwork: tf.LayersModel
   private optimizer: tf.Optimizer
+  private gammaTensor: tf.Scalar  // Kept on device instead of re-creating the scalar every step
+
+  // Matching [policy, target] weight variables, cached for target updates
+  private targetSyncPairs: Array<[ModelWeight, ModelWeight]> = []
+  // Variables the optimizer updates (policy network only)
+  private policyVariables: tf.Variable[] = []
 
   // Training state
   private trainingSteps: number = 0
@@ -105,8 +120,18 @@ export class TFDQNAgent {
 
   // Metrics
   private lastLoss: number = 0
+  private lastLossTensor: tf.Scalar | null = null  // Latest loss, not yet read back
   private lastQValues: number[] = [0, 0]
 
+  // Weight export cache: weightsVersion is bumped whenever the policy weights change
+  private weightsVersion: number = 0
+  private weightsJSONCache: { layerWeights: number[][][] } | null = null
+  private weightsJSONCacheVersion: number = -1
+
+  // Reusable host-side staging buffer for inference inputs (grown on demand)
+  private inputStaging: Float32Array = new Float32Array(0)
+  private actionMaskStaging: Float32Array = new Float32Array(0)
+
   constructor(config: Partial<TFDQNConfig> = {}) {
     this.config = { ...DefaultTFDQNConfig, ...config }
     this.epsilon = this.config.epsilonStart
@@ -118,22 +143,22 @@ export class TFDQNAgent {
     this.policyNetwork = createDQNModel(
       this.config.inputDim,
       this.config.hiddenLayers,
-      this.config.actionDim,
-      this.config.learningRate
+      this.config.actionDim
     )
 
     this.targetNetwork = createDQNModel(
       this.config.inputDim,
       this.config.hiddenLayers,
-      this.config.actionDim,
-      this.config.learningRate
+      this.config.actionDim
     )
 
     // Initialize target network with same weights as policy
+    this.bindNetworks()
     this.syncTargetNetwork()
 
     // Create optimizer for manual training
     this.optimizer = tf.train.adam(this.config.learningRate)
+    this.gammaTensor = tf.scalar(this.config.gamma)
 
     console.log('[TFDQNAgent] Created with config:', this.config)
   }
@@ -149,9 +174,11 @@ export class TFDQNAgent {
     this.lastQValues = qValues
 
     // Epsilon-greedy exploration
-    if (training && Math.random() < this.epsilon) {
-      // Biased exploration: 20% flap, 80% no-flap (flapping has momentum)
-      return Math.random() < 0.2 ? 1 : 0
+    const roll = training ? Math.random() : 1
+    if (roll < this.epsilon) {
+      // Biased exploration: 20% flap, 80% no-flap (flapping has momentum).
+      // Given roll < epsilon, roll / epsilon is uniform, so one draw decides both
+      return roll < this.epsilon * 0.2 ? 1 : 0
     }
 
     // Greedy action
@@ -164,149 +191,203 @@ export class TFDQNAgent {
    */
   actBatch(states: number[][], training: boolean = true): number[] {
     // Note: epsilon is updated via recordEnvSteps() in the training loop, not here
+    const n = states.length
+
+    // Draw exploration decisions first; -1 marks envs that act greedily.
+    // One uniform draw per env picks both explore-vs-greedy and the biased
+    // exploratory action (see act())
+    const actions: number[] = new Array(n)
+    const epsilon = this.epsilon
+    const flapThreshold = epsilon * 0.2
+    let greedyCount = 0
+    for (let i = 0; i < n; i++) {
+      // Outside training nothing explores, so no draw is needed
+      const roll = training ? Math.random() : 1
+      if (roll < epsilon) {
+        actions[i] = roll < flapThreshold ? 1 : 0
+      } else {
+        actions[i] = -1
+        greedyCount++
+      }
+    }
 
-    // Batched prediction
-    const qValuesBatch = this.predictBatch(states)
+    // Every env explored: no Q-values are needed, so skip the forward pass and readback
+    if (greedyCount === 0) return actions
 
-    // Select actions
-    return qValuesBatch.map((qValues) => {
-      if (training && Math.random() < this.epsilon) {
-        return Math.random() < 0.2 ? 1 : 0
-      }
-      return qValues[0] > qValues[1] ? 0 : 1
-    })
+    // Batched greedy actions, reduced on device so only one index per env is read back
+    const greedy = this.greedyActionsBatch(states)
+    for (let i = 0; i < n; i++) {
+      if (actions[i] < 0) actions[i] = greedy[i]
+    }
+    return actions
   }
 
   /**
    * Predict Q-values for a single state
    */
   predictSingle(state: number[]): number[] {
-    return tf.tidy(() => {
-      const stateTensor = tf.tensor2d([state], [1, this.config.inputDim])
-      const prediction = this.policyNetwork.predict(stateTensor) as tf.Tensor
-      return Array.from(prediction.dataSync())
-    })
+    // Goes through the same reused staging buffer as batched inference, so the
+    // per-frame network visualization doesn't allocate a fresh nested input
+    return Array.from(this.predictBatchFlat([state]))
   }
 
   /**
    * Predict Q-values for a batch of states
    */
   predictBatch(states: number[][]): number[][] {
+    const flat = this.predictBatchFlat(states)
+    const actionDim = this.config.actionDim
+    const result: number[][] = []
+    for (let i = 0; i < states.length; i++) {
+      result.push(Array.from(flat.subarray(i * actionDim, (i + 1) * actionDim)))
+    }
+    return result
+  }
+
+  /**
+   * Predict Q-values for a batch of states as a flat row-major array.
+   * States are copied into a reused Float32Array instead of letting tf.js
+   * flatten and re-allocate the nested arrays on every call.
+   */
+  private predictBatchFlat(states: number[][]): Float32Array {
+    const input = this.stageStates(states)
     return tf.tidy(() => {
-      const stateTensor = tf.tensor2d(states, [states.length, this.config.inputDim])
-      const prediction = this.policyNetwork.predict(stateTensor) as tf.Tensor
-      const data = prediction.arraySync() as number[][]
-      return data
+      const stateTensor = tf.tensor2d(input, [states.length, this.config.inputDim])
+      const prediction = forward(this.policyNetwork, stateTensor)
+      return prediction.dataSync() as Float32Array
     })
   }
 
   /**
-   * Train on a batch of transitions
-   * Returns the average loss
+   * Greedy action per state: argMax runs on device so the readback is
+   * [n] indices instead of the full [n * actionDim] Q-value matrix
    */
-  trainBatch(
-    states: number[][],
-    actions: number[],
-    rewards: number[],
-    nextStates: number[][],
-    dones: boolean[]
-  ): number {
-    const batchSize = states.length
-
-    const loss = tf.tidy(() => {
-      // Convert to tensors
-      const statesTensor = tf.tensor2d(states, [batchSize, this.config.inputDim])
-      const nextStatesTensor = tf.tensor2d(nextStates, [batchSize, this.config.inputDim])
-      const rewardsTensor = tf.tensor1d(rewards)
-      const donesTensor = tf.tensor1d(dones.map(d => d ? 0 : 1)) // 0 if done, 1 otherwise
-
-      // Compute target Q-values using target network
-      const nextQValues = this.targetNetwork.predict(nextStatesTensor) as tf.Tensor
-      const maxNextQ = nextQValues.max(1)
-      const targets = rewardsTensor.add(
-        donesTensor.mul(tf.scalar(this.config.gamma)).mul(maxNextQ)
-      )
-
-      // Get current Q-values for the taken actions
-      const currentQValues = this.policyNetwork.predict(statesTensor) as tf.Tensor
-
-      // Create target Q-values (only update the action taken)
-      const actionIndices = tf.tensor1d(actions, 'int32')
-      const batchIndices = tf.range(0, batchSize, 1, 'int32')
-      const indices = tf.stack([batchIndices, actionIndices], 1)
-
-      // Scatter update to create target tensor
-      const targetQValues = currentQValues.clone()
-      const targetValues = tf.tensorScatterUpdate(
-        targetQValues,
-        indices,
-        targets
-      )
-
-      // Compute Huber loss
-      const lossValue = tf.losses.huberLoss(targetValues, currentQValues)
-      return lossValue.dataSync()[0]
+  private greedyActionsBatch(states: number[][]): Int32Array {
+    const input = this.stageStates(states)
+    return tf.tidy(() => {
+      const stateTensor = tf.tensor2d(input, [states.length, this.config.inputDim])
+      return forward(this.policyNetwork, stateTensor).argMax(1).dataSync() as Int32Array
     })
+  }
+
+  /**
+   * Copy states into the staging buffer and return a view over the used rows
+   */
+  private stageStates(states: number[][]): Float32Array {
+    const inputDim = this.config.inputDim
+    const needed = states.length * inputDim
+    if (this.inputStaging.length < needed) {
+      this.inputStaging = new Float32Array(needed)
+    }
+    const staging = this.inputStaging
+    for (let i = 0; i < states.length; i++) {
+      const state = states[i]
+      const offset = i * inputDim
+      for (let k = 0; k < inputDim; k++) {
+        staging[offset + k] = state[k]
+      }
+    }
+    return staging.subarray(0, needed)
+  }
 
+  /**
+   * Train on a batch of transitions
+   * The loss stays on device; read it with getLastLoss() when it is actually needed
+   */
+  trainBatch(batch: ReplayBatch): void {
     // Perform gradient descent
-    this.optimizerStep(states, actions, rewards, nextStates, dones)
+    const loss = this.optimizerStep(batch)
+    this.lastLossTensor?.dispose()
+    this.lastLossTensor = loss
 
     this.trainingSteps++
-    this.lastLoss = loss
+    this.weightsVersion++
 
     // Update target network periodically
     if (this.trainingSteps % this.config.targetUpdateFreq === 0) {
       this.syncTargetNetwork()
     }
-
-    return loss
   }
 
   /**
-   * Perform optimizer step with gradient clipping
+   * Perform optimizer step, returning the (un-synced) loss tensor
    */
-  private optimizerStep(
-    states: number[][],
-    actions: number[],
-    rewards: number[],
-    nextStates: number[][],
-    dones: boolean[]
-  ): void {
-    const batchSize = states.length
-
-    tf.tidy(() => {
-      const statesTensor = tf.tensor2d(states, [batchSize, this.config.inputDim])
-      const nextStatesTensor = tf.tensor2d(nextStates, [batchSize, this.config.inputDim])
-      const rewardsTensor = tf.tensor1d(rewards)
-      const donesTensor = tf.tensor1d(dones.map(d => d ? 0 : 1))
-
-      // Compute targets
-      const nextQValues = this.targetNetwork.predict(nextStatesTensor) as tf.Tensor
-      const maxNextQ = nextQValues.max(1)
+  private optimizerStep(batch: ReplayBatch): tf.Scalar {
+    const batchSize = batch.size
+
+    return tf.tidy(() => {
+      // One upload for all float inputs; contiguous slices of it are views, not copies
+      const stateSize = batchSize * this.config.inputDim
+      const packed = tf.tensor1d(batch.packed)
+      const statesTensor = packed.slice(0, stateSize).reshape([batchSize, this.config.inputDim])
+      const nextStatesTensor = packed.slice(stateSize, stateSize).reshape([batchSize, this.config.inputDim])
+      const rewardsTensor = packed.slice(2 * stateSize, batchSize)
+      const notDonesTensor = packed.slice(2 * stateSize + batchSize, batchSize) // 0 if done, 1 otherwise
+
+      // Bellman target r + gamma * (1 - done) * max_a' Q_target(s', a'), built outside
+      // the gradient tape so none of it is recorded for backprop
+      const maxNextQ = forward(this.targetNetwork, nextStatesTensor).max(1)
       const targets = rewardsTensor.add(
-        donesTensor.mul(tf.scalar(this.config.gamma)).mul(maxNextQ)
+        notDonesTensor.mul(maxNextQ).mul(this.gammaTensor)
       )
 
-      // Use optimizer.minimize to avoid gatherND gradients
-      const actionTensor = tf.tensor1d(actions, 'int32')
+      // Use optimizer.minimize to avoid gatherND gradients; the one-hot action
+      // mask is written on the CPU instead of running a oneHot kernel every step
+      const actionMask = tf.tensor2d(this.buildActionMask(batch), [batchSize, this.config.actionDim])
       const lossFn = () => {
-        const currentQValues = this.policyNetwork.predict(statesTensor) as tf.Tensor
-        const actionOneHot = tf.oneHot(actionTensor, this.config.actionDim) as tf.Tensor2D
-        const predictedQ = tf.sum(tf.mul(currentQValues, actionOneHot), 1)
+        const currentQValues = forward(this.policyNetwork, statesTensor)
+        const predictedQ = tf.sum(tf.mul(currentQValues, actionMask), 1)
         const lossTensor = tf.losses.huberLoss(targets, predictedQ) as tf.Scalar
         return lossTensor
       }
 
-      this.optimizer.minimize(lossFn, /* returnCost */ false)
+      return this.optimizer.minimize(lossFn, /* returnCost */ true, this.policyVariables) as tf.Scalar
     })
   }
 
+  /**
+   * Fill the reused one-hot mask for the batch's actions
+   */
+  private buildActionMask(batch: ReplayBatch): Float32Array {
+    const actionDim = this.config.actionDim
+    const needed = batch.size * actionDim
+    if (this.actionMaskStaging.length !== needed) {
+      this.actionMaskStaging = new Float32Array(needed)
+    } else {
+      this.actionMaskStaging.fill(0)
+    }
+    for (let i = 0; i < batch.size; i++) {
+      this.actionMaskStaging[i * actionDim + batch.actions[i]] = 1
+    }
+    return this.actionMaskStaging
+  }
+
   /**
    * Copy weights from policy network to target network
    */
   syncTargetNetwork(): void {
-    const policyWeights = this.policyNetwork.getWeights()
-    this.targetNetwork.setWeights(policyWeights)
+    // Write each policy variable straight into its target counterpart; avoids
+    // rebuilding the weight lists and shape checks of getWeights()/setWeights()
+    for (const [policyWeight, targetWeight] of this.targetSyncPairs) {
+      targetWeight.write(policyWeight.read())
+    }
+  }
+
+  /**
+   * Wire up freshly created networks (call whenever the networks are recreated):
+   * freeze the target network, pair policy/target weights for target updates and
+   * cache the policy variables handed to the optimizer
+   */
+  private bindNetworks(): void {
+    // The target network only provides bootstrap values; marking it non-trainable keeps
+    // its variables out of gradient computation (minimize() otherwise differentiates
+    // with respect to every trainable variable registered with the engine)
+    this.targetNetwork.trainable = false
+
+    const policyWeights = this.policyNetwork.weights
+    const targetWeights = this.targetNetwork.weights
+    this.targetSyncPairs = policyWeights.map((w, i) => [w, targetWeights[i]])
+    this.policyVariables = this.policyNetwork.trainableWeights.map(w => w.read() as tf.Variable)
   }
 
   /**
@@ -390,7 +471,8 @@ export class TFDQNAgent {
 
   setLearningRate(lr: number): void {
     this.config.learningRate = lr
-    // Recreate optimizer with new learning rate
+    // Recreate optimizer with new learning rate, releasing the old moment variables
+    this.optimizer.dispose()
     this.optimizer = tf.train.adam(lr)
   }
 
@@ -444,13 +526,23 @@ export class TFDQNAgent {
 
   setGamma(value: number): void {
     this.config.gamma = Math.max(0, Math.min(1, value))
+    this.gammaTensor.dispose()
+    this.gammaTensor = tf.scalar(this.config.gamma)
   }
 
   getTrainingSteps(): number {
     return this.trainingSteps
   }
 
+  /**
+   * Latest training loss (reads the pending loss back from the device on first access)
+   */
   getLastLoss(): number {
+    if (this.lastLossTensor) {
+      this.lastLoss = this.lastLossTensor.dataSync()[0]
+      this.lastLossTensor.dispose()
+      this.lastLossTensor = null
+    }
     return this.lastLoss
   }
 
@@ -476,6 +568,12 @@ export class TFDQNAgent {
    * Export weights as a serializable object for checkpoints
    */
   getWeightsJSON(): { layerWeights: number[][][] } {
+    // Reading weights back is a device sync plus a nested-array copy of every layer;
+    // reuse the last export while no training step or load has touched the weights
+    if (this.weightsJSONCache && this.weightsJSONCacheVersion === this.weightsVersion) {
+      return this.weightsJSONCache
+    }
+
     const weights = this.policyNetwork.getWeights()
     const layerWeights: number[][][] = []
 
@@ -486,7 +584,9 @@ export class TFDQNAgent {
       }
     }
 
-    return { layerWeights }
+    this.weightsJSONCache = { layerWeights }
+    this.weightsJSONCacheVersion = this.weightsVersion
+    return this.weightsJSONCache
   }
 
   /**
@@ -509,6 +609,7 @@ export class TFDQNAgent {
 
     this.policyNetwork.setWeights(newWeights)
     this.syncTargetNetwork()
+    this.weightsVersion++
 
     // Dispose old tensors
     newWeights.forEach(t => t.dispose())
@@ -524,6 +625,8 @@ export class TFDQNAgent {
     this.decayStartEpsilon = this.config.epsilonStart
     this.decayStartEnvStep = 0
     this.lastLoss = 0
+    this.lastLossTensor?.dispose()
+    this.lastLossTensor = null
     this.lastQValues = [0, 0]
 
     // Recreate networks
@@ -533,24 +636,28 @@ export class TFDQNAgent {
     this.policyNetwork = createDQNModel(
       this.config.inputDim,
       this.config.hiddenLayers,
-      this.config.actionDim,
-      this.config.learningRate
+      this.config.actionDim
     )
 
     this.targetNetwork = createDQNModel(
       this.config.inputDim,
       this.config.hiddenLayers,
-      this.config.actionDim,
-      this.config.learningRate
+      this.config.actionDim
     )
 
+    this.bindNetworks()
     this.syncTargetNetwork()
+    this.weightsVersion++
   }
 
   /**
    * Dispose TensorFlow resources
    */
   dispose(): void {
+    this.lastLossTensor?.dispose()
+    this.lastLossTensor = null
+    this.optimizer.dispose()
+    this.gammaTensor.dispose()
     this.policyNetwork.dispose()
     this.targetNetwork.dispose()
   }
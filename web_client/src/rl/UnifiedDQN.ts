@@ -14,7 +14,7 @@ import type { BaseGameState } from './IVectorizedEnv'
 
 // Import worker message types
 type WorkerMessage =
-  | { type: 'init'; config: Partial<TFDQNConfig>; numEnvs: number; backend: BackendType | 'auto'; gameId?: string }
+  | { type: 'init'; config: Partial<TFDQNConfig>; numEnvs: number; backend: BackendType | 'auto'; gameId?: string; streams?: { gameStates: boolean; network: boolean; weightHealth: boolean } }
   | { type: 'setNumEnvs'; count: number }
   | { type: 'startTraining'; visualize: boolean }
   | { type: 'stopTraining' }
@@ -36,7 +36,7 @@ type WorkerMessage =
 type WorkerResponse =
   | { type: 'ready'; backend: BackendType }
   | { type: 'metrics'; data: TrainingMetrics }
-  | { type: 'gameStates'; states: BaseGameState[]; rewards?: number[]; cumulativeRewards?: number[] }
+  | { type: 'gameStates'; states: Array<BaseGameState | null>; rewards?: number[]; cumulativeRewards?: number[]; delta?: boolean }
   | { type: 'weights'; data: { layerWeights: number[][][] } }
   | { type: 'autoEvalResult'; result: AutoEvalResult }
   | { type: 'weightHealth'; data: WeightHealthMetrics }
@@ -89,6 +89,7 @@ export class UnifiedDQN {
   private currentBackend: BackendType = 'cpu'
   private lastMetrics: TrainingMetrics = { ...DefaultTrainingMetrics }
   private lastWeights: { layerWeights: number[][][] } | null = null
+  private lastGameStates: BaseGameState[] = []  // Reassembles delta frames from the worker
 
   constructor(config: Partial<UnifiedDQNConfig> = {}) {
     this.config = { ...DEFAULT_CONFIG, ...config }
@@ -142,6 +143,12 @@ export class UnifiedDQN {
         numEnvs: this.config.numInstances,
         backend: this.config.backend,
         gameId: this.config.gameId,
+        // Let the worker skip building frames for callbacks that aren't registered
+        streams: {
+          gameStates: !!callbacks.onGameStates,
+          network: !!callbacks.onNetwork,
+          weightHealth: !!callbacks.onWeightHealth,
+        },
       })
     })
   }
@@ -161,9 +168,13 @@ export class UnifiedDQN {
         this.callbacks.onMetrics?.(msg.data)
         break
 
-      case 'gameStates':
-        this.callbacks.onGameStates?.(msg.states, msg.rewards, msg.cumulativeRewards)
+      case 'gameStates': {
+        // Delta frames carry null for envs unchanged since the last frame
+        const states = msg.states.map((state, i) => state ?? this.lastGameStates[i])
+        this.lastGameStates = states
+        this.callbacks.onGameStates?.(states, msg.rewards, msg.cumulativeRewards)
         break
+      }
 
       case 'weights':
         this.lastWeights = msg.data
@@ -405,16 +416,19 @@ export class UnifiedDQN {
       },
       network: weights,
     }
-    return JSON.stringify(checkpoint, null, 2)
+    // Compact JSON: pretty-printing put every weight on its own indented line,
+    // roughly doubling the file size of a checkpoint that is almost all numbers
+    return JSON.stringify(checkpoint)
   }
 
   /**
-   * Load checkpoint from JSON
+   * Load checkpoint from a JSON string or an already-parsed checkpoint object
+   * (callers that inspect the checkpoint first can pass the object to skip a second parse)
    */
-  loadCheckpoint(json: string): boolean {
+  loadCheckpoint(json: string | Record<string, any>): boolean {
     try {
-      const checkpoint = JSON.parse(json)
-      
+      const checkpoint = typeof json === 'string' ? JSON.parse(json) : json
+
       // Validate checkpoint format
       const validTypes = ['flappy-ai-checkpoint-v1', 'flappy-ai-checkpoint-v2', 'flappy-ai-checkpoint-v3']
       if (!checkpoint || !validTypes.includes(checkpoint.type)) {
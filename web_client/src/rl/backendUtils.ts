@@ -31,6 +31,11 @@ const BACKEND_INFO: Record<BackendType, BackendInfo> = {
 export async function initBestBackend(
   preferred: BackendType | 'auto' = 'auto'
 ): Promise<BackendInfo> {
+  // Production builds skip tf.js debug-mode validation and warnings on every op
+  if (import.meta.env.PROD && !tf.env().getBool('PROD')) {
+    tf.enableProdMode()
+  }
+
   // If a specific backend is preferred, try it first
   if (preferred !== 'auto') {
     const success = await trySetBackend(preferred)
@@ -36,7 +36,7 @@ export {
 } from './backendUtils'
 
 // ===== Shared Components =====
-export { ReplayBuffer, type Transition } from './ReplayBuffer'
+export { ReplayBuffer, type Transition, type ReplayBatch } from './ReplayBuffer'
 
 export {
   type IVectorizedEnv,
@@ -19,8 +19,15 @@ import { initBestBackend, type BackendType } from './backendUtils'
 
 // ===== Message Types =====
 
+/** Visualization streams the main thread has listeners for (all on if omitted) */
+export interface WorkerStreams {
+  gameStates: boolean
+  network: boolean
+  weightHealth: boolean
+}
+
 type WorkerMessage =
-  | { type: 'init'; config: Partial<TFDQNConfig>; numEnvs: number; backend: BackendType | 'auto'; gameId?: string }
+  | { type: 'init'; config: Partial<TFDQNConfig>; numEnvs: number; backend: BackendType | 'auto'; gameId?: string; streams?: WorkerStreams }
   | { type: 'setNumEnvs'; count: number }
   | { type: 'startTraining'; visualize: boolean }
   | { type: 'stopTraining' }
@@ -42,7 +49,7 @@ type WorkerMessage =
 type WorkerResponse =
   | { type: 'ready'; backend: BackendType }
   | { type: 'metrics'; data: TrainingMetrics }
-  | { type: 'gameStates'; states: BaseGameState[]; rewards?: number[]; cumulativeRewards?: number[] }
+  | { type: 'gameStates'; states: Array<BaseGameState | null>; rewards?: number[]; cumulativeRewards?: number[]; delta?: boolean }
   | { type: 'weights'; data: { layerWeights: number[][][] } }
   | { type: 'autoEvalResult'; result: AutoEvalResult }
   | { type: 'weightHealth'; data: WeightHealthMetrics }
@@ -95,6 +102,14 @@ let bufferCapacity = DefaultTFDQNConfig.bufferSize
 let lastMetricsTime = 0
 let lastStatesTime = 0
 let lastNetworkVizTime = 0
+let streams: WorkerStreams = { gameStates: true, network: true, weightHealth: true }
+
+// Game-state frame deltas: finished envs that haven't reset yet are frozen, so
+// delta frames send null for them; a full keyframe goes out periodically
+const KEYFRAME_INTERVAL = 30  // ~1s at STATES_INTERVAL
+let lastSentStates: BaseGameState[] = []
+let lastSentDone: boolean[] = []  // done at send time (state objects are mutated in place)
+let framesSinceKeyframe = 0
 let previousWeights: number[][][] | null = null
 const METRICS_INTERVAL = 500  // Emit metrics every 500ms
 const STATES_INTERVAL = 33    // Emit states at ~30fps for visualization
@@ -102,6 +117,20 @@ const NETWORK_VIZ_INTERVAL = 33  // Emit network viz at ~30fps
 const TRAIN_FREQ = 4          // Train every N steps
 const BATCH_SIZE = 64         // Training batch size
 
+// Zero-delay loop continuation. Nested setTimeout(fn, 0) is clamped to >= 4ms
+// by browsers, which idles the worker between batches; a MessageChannel task
+// runs as soon as pending messages (e.g. stopTraining) have been handled.
+const continuationChannel = new MessageChannel()
+const continuationQueue: Array<() => void> = []
+continuationChannel.port1.onmessage = () => {
+  continuationQueue.shift()?.()
+}
+
+function scheduleNext(task: () => void): void {
+  continuationQueue.push(task)
+  continuationChannel.port2.postMessage(null)
+}
+
 function applyScaling(currentNumEnvs: number): void {
   const N = Math.max(1, currentNumEnvs)
 
@@ -251,49 +280,31 @@ function runTrainingBatch(): void {
       const result = env.stepAll(actions, true)  // Auto-reset for training
 
       // Store transitions in replay buffer
-      for (let j = 0; j < numEnvs; j++) {
-        buffer.add({
-          state: observations[j],
-          action: actions[j],
-          reward: result.rewards[j],
-          nextState: result.observations[j],
-          done: result.dones[j],
-        })
-      }
+      buffer.addStep(observations, actions, result.rewards, result.observations, result.dones)
 
       // Update metrics and epsilon decay (env steps drive epsilon decay)
       metricsCollector.recordSteps(numEnvs)
       agent.recordEnvSteps(numEnvs)  // This updates epsilon based on total env steps
 
       // Train agent (after warmup, every TRAIN_FREQ steps)
-      const totalSteps = metricsCollector.getMetrics().totalSteps
+      const totalSteps = metricsCollector.getTotalSteps()
       const bufferSize = buffer.size()
       
       if (bufferSize >= warmupSize && totalSteps % TRAIN_FREQ === 0) {
-        const batch = buffer.sample(BATCH_SIZE)
-        const loss = agent.trainBatch(
-          batch.map(t => t.state),
-          batch.map(t => t.action),
-          batch.map(t => t.reward),
-          batch.map(t => t.nextState),
-          batch.map(t => t.done)
-        )
-        metricsCollector.updateTrainingMetrics({ loss, bufferSize })
+        agent.trainBatch(buffer.sampleBatch(BATCH_SIZE))
       }
 
-      // Update epsilon in metrics
-      metricsCollector.updateTrainingMetrics({ epsilon: agent.getEpsilon() })
-
       observations = result.observations
 
       // Check if we should run auto-eval (every autoEvalInterval episodes, after warmup)
-      const currentEpisode = metricsCollector.getMetrics().episode
+      const currentEpisode = metricsCollector.getEpisode()
       if (autoEvalEnabled && 
           !isAutoEvalRunning && 
           bufferSize >= warmupSize && 
           currentEpisode > 0 && 
           currentEpisode - lastAutoEvalEpisode >= autoEvalInterval) {
         // Pause training and run auto-eval
+        metricsCollector.updateTrainingMetrics({ epsilon: agent.getEpsilon() })
         runAutoEval()
         return  // Exit batch loop, auto-eval will resume training when done
       }
@@ -302,6 +313,9 @@ function runTrainingBatch(): void {
       if (performance.now() - startTime > 50) break
     }
 
+    // Epsilon only changes with env steps, so publish it once per batch rather than per step
+    metricsCollector.updateTrainingMetrics({ epsilon: agent.getEpsilon() })
+
     // Emit metrics periodically
     const now = performance.now()
     if (now - lastMetricsTime >= METRICS_INTERVAL) {
@@ -330,7 +344,7 @@ function runTrainingBatch(): void {
 
   // Continue training loop (even after error, to allow recovery)
   if (isTraining) {
-    setTimeout(runTrainingBatch, 0)
+    scheduleNext(runTrainingBatch)
   }
 }
 
@@ -393,7 +407,7 @@ function runEvalBatch(): void {
 
   // Continue eval loop (even after error, to allow recovery)
   if (isEval) {
-    setTimeout(runEvalBatch, 0)
+    scheduleNext(runEvalBatch)
   }
 }
 
@@ -412,7 +426,7 @@ function finishEval(): void {
       ? [...scores].sort((a, b) => a - b)[Math.floor(scores.length / 2)]
       : 0,
     scores: [...scores],
-    episode: metricsCollector?.getMetrics().episode || 0,
+    episode: metricsCollector?.getEpisode() || 0,
     numTrials: scores.length,
     isAutoEval: wasAutoEval,
   }
@@ -431,7 +445,7 @@ function finishEval(): void {
 function runAutoEval(): void {
   if (!agent || !env || isAutoEvalRunning) return
 
-  const currentEpisode = metricsCollector?.getMetrics().episode || 0
+  const currentEpisode = metricsCollector?.getEpisode() || 0
   console.log(`[TFWorker] Starting auto-eval at episode ${currentEpisode}`)
   
   isAutoEvalRunning = true
@@ -522,6 +536,7 @@ function emitMetrics(): void {
 
   metricsCollector.updateTrainingMetrics({
     epsilon: agent.getEpsilon(),  // Always include current epsilon
+    loss: agent.getLastLoss(),    // Only synced from the device here, not every train step
     learningRate: agent.getLearningRate(),
     bufferSize: buffer?.size() || 0,
     isAutoEval: isAutoEvalRunning,
@@ -534,23 +549,46 @@ function emitMetrics(): void {
 }
 
 function emitGameStates(): void {
-  if (!env) return
+  if (!env || !streams.gameStates) return
+
+  // Already columnar, so no per-env wrapper objects or re-splitting here
+  const { states, rewards, cumulativeRewards } = env.getStatesWithRewards()
+
+  const keyframe = framesSinceKeyframe >= KEYFRAME_INTERVAL || states.length !== lastSentStates.length
+  let frameStates: Array<BaseGameState | null> = states
+  if (keyframe) {
+    framesSinceKeyframe = 0
+  } else {
+    // A done env keeps the same state object until it is reset, so an unchanged
+    // reference that was already done when last sent means nothing to redraw
+    frameStates = new Array(states.length)
+    let changed = 0
+    for (let i = 0; i < states.length; i++) {
+      const state = states[i]
+      if (state === lastSentStates[i] && lastSentDone[i]) {
+        frameStates[i] = null
+      } else {
+        frameStates[i] = state
+        changed++
+      }
+    }
+    framesSinceKeyframe++
+    if (changed === 0) return
+  }
+  lastSentStates = states
+  lastSentDone = states.map(state => state.done)
 
-  const statesWithRewards = env.getStatesWithRewards()
-  const states = statesWithRewards.map(s => s.state)
-  const rewards = statesWithRewards.map(s => s.reward)
-  const cumulativeRewards = statesWithRewards.map(s => s.cumulativeReward)
-  
   self.postMessage({ 
     type: 'gameStates', 
-    states,
+    states: frameStates,
     rewards,
     cumulativeRewards,
+    delta: !keyframe,
   } as WorkerResponse)
 }
 
 function emitWeightHealth(): void {
-  if (!agent) return
+  if (!agent || !streams.weightHealth) return
 
   const currentWeights = agent.getWeightsJSON().layerWeights
 
@@ -603,7 +641,7 @@ function emitWeightHealth(): void {
  * Sends input, Q-values, and selected action for NetworkViewer
  */
 function emitNetworkViz(): void {
-  if (!agent || !env || numEnvs !== 1) return
+  if (!agent || !env || numEnvs !== 1 || !streams.network) return
 
   // Get current observation from first (only) environment
   const observations = env.getObservations()
@@ -623,7 +661,7 @@ function emitNetworkViz(): void {
   const exploreRoll = Math.random()
   const isExploring = isTraining && exploreRoll < epsilon
   const selectedAction = isExploring 
-    ? (Math.random() < 0.2 ? 1 : 0)  // Biased exploration
+    ? (exploreRoll < epsilon * 0.2 ? 1 : 0)  // Biased exploration
     : greedyAction
 
   // Send input, output, and exploration info
@@ -648,6 +686,8 @@ self.onmessage = async (e: MessageEvent<WorkerMessage>) => {
   try {
     switch (msg.type) {
       case 'init':
+        // Frames nobody listens to are not built or posted
+        if (msg.streams) streams = { ...msg.streams }
         await initialize(msg.config, msg.numEnvs, msg.backend, msg.gameId || DEFAULT_GAME_ID)
         break
 
@@ -803,7 +843,7 @@ self.onmessage = async (e: MessageEvent<WorkerMessage>) => {
         autoEvalEnabled = msg.enabled
         if (typeof msg.interval === 'number' && msg.interval > 0) {
           const newInterval = msg.interval
-          const currentEpisode = metricsCollector?.getMetrics().episode || 0
+          const currentEpisode = metricsCollector?.getEpisode() || 0
           const gapSinceLastEval = currentEpisode - lastAutoEvalEpisode
           
           // If new interval is smaller and would immediately trigger, reset the counter
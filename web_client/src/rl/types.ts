@@ -125,8 +125,14 @@ export const DefaultMetricsConfig: MetricsConfig = {
 export class MetricsCollector {
   private config: MetricsConfig
   private metrics: TrainingMetrics
-  private recentRewards: number[] = []
-  private recentLengths: number[] = []
+  // Rolling window as a ring with running sums: O(1) per episode instead of
+  // shifting the window and re-summing it on every completion
+  private recentRewards: Float64Array
+  private recentLengths: Float64Array
+  private windowIndex: number = 0
+  private windowCount: number = 0
+  private rewardSum: number = 0
+  private lengthSum: number = 0
   private lastEmitTime: number = 0
   private stepsSinceLastEmit: number = 0
   private episodesSinceLastEmit: number = 0
@@ -134,6 +140,8 @@ export class MetricsCollector {
   constructor(config: Partial<MetricsConfig> = {}) {
     this.config = { ...DefaultMetricsConfig, ...config }
     this.metrics = { ...DefaultTrainingMetrics }
+    this.recentRewards = new Float64Array(Math.max(1, this.config.rollingWindowSize))
+    this.recentLengths = new Float64Array(Math.max(1, this.config.rollingWindowSize))
     this.lastEmitTime = performance.now()
   }
 
@@ -146,16 +154,30 @@ export class MetricsCollector {
     this.metrics.episodeLength = length
     this.episodesSinceLastEmit++
 
-    // Update rolling averages
-    this.recentRewards.push(reward)
-    this.recentLengths.push(length)
-    if (this.recentRewards.length > this.config.rollingWindowSize) {
-      this.recentRewards.shift()
-      this.recentLengths.shift()
+    // Update rolling averages (replace the oldest entry once the window is full)
+    const windowSize = this.recentRewards.length
+    const i = this.windowIndex
+    if (this.windowCount === windowSize) {
+      this.rewardSum -= this.recentRewards[i]
+      this.lengthSum -= this.recentLengths[i]
+    } else {
+      this.windowCount++
     }
+    this.recentRewards[i] = reward
+    this.recentLengths[i] = length
+    this.rewardSum += reward
+    this.lengthSum += length
 
-    this.metrics.avgReward = this.recentRewards.reduce((a, b) => a + b, 0) / this.recentRewards.length
-    this.metrics.avgLength = this.recentLengths.reduce((a, b) => a + b, 0) / this.recentLengths.length
+    this.windowIndex = i + 1
+    if (this.windowIndex === windowSize) {
+      this.windowIndex = 0
+      // Re-sum once per lap so floating-point drift can't accumulate over long runs
+      this.rewardSum = this.recentRewards.reduce((a, b) => a + b, 0)
+      this.lengthSum = this.recentLengths.reduce((a, b) => a + b, 0)
+    }
+
+    this.metrics.avgReward = this.rewardSum / this.windowCount
+    this.metrics.avgLength = this.lengthSum / this.windowCount
   }
 
   /**
@@ -210,13 +232,31 @@ export class MetricsCollector {
     return { ...this.metrics }
   }
 
+  /**
+   * Total env steps recorded so far (no metrics snapshot copy, for per-step checks)
+   */
+  getTotalSteps(): number {
+    return this.metrics.totalSteps
+  }
+
+  /**
+   * Current episode count (no metrics snapshot copy, for per-step checks)
+   */
+  getEpisode(): number {
+    return this.metrics.episode
+  }
+
   /**
    * Reset all metrics
    */
   reset(): void {
     this.metrics = { ...DefaultTrainingMetrics }
-    this.recentRewards = []
-    this.recentLengths = []
+    this.recentRewards.fill(0)
+    this.recentLengths.fill(0)
+    this.windowIndex = 0
+    this.windowCount = 0
+    this.rewardSum = 0
+    this.lengthSum = 0
     this.stepsSinceLastEmit = 0
     this.episodesSinceLastEmit = 0
     this.lastEmitTime = performance.now()